@@ -1,10 +1,17 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime, timedelta
-import itertools
+
+from fashion_trends import (
+    TIMEFRAME_OPTIONS, ScoreCache, city_rankings, compute_aggregates, compute_all_combinations,
+    latest_master_data, make_selection, master_data_info, master_data_version, pin_master_data,
+    refresh_master_data, score_cache, series_stats, timeseries_for_frame, top_k,
+)
+from fashion_trends.cards import RANK_COLORS, RANK_LABELS, get_insight, sparkline_svg, swatch_html
+from fashion_trends.export import EXPORT_FORMATS, export_frame, iter_chunks, selection_export
+from fashion_trends.ingest import cached_interest, recent_window
+from fashion_trends.profiling import RunProfiler, Timings, profile_mode
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  PAGE CONFIG
@@ -248,222 +255,37 @@ footer, .stDeployButton { display: none !important; }
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-#  MASTER DATA DEFINITIONS
-# ══════════════════════════════════════════════════════════════════════════════
-
-TOP10_CITIES = {
-    "Mumbai":    {"rank":1,  "market_bn":42.0, "region":"West",  "tier":"Metro"},
-    "Delhi":     {"rank":2,  "market_bn":38.5, "region":"North", "tier":"Metro"},
-    "Bengaluru": {"rank":3,  "market_bn":29.0, "region":"South", "tier":"Metro"},
-    "Hyderabad": {"rank":4,  "market_bn":22.0, "region":"South", "tier":"Metro"},
-    "Chennai":   {"rank":5,  "market_bn":19.5, "region":"South", "tier":"Metro"},
-    "Kolkata":   {"rank":6,  "market_bn":17.0, "region":"East",  "tier":"Metro"},
-    "Pune":      {"rank":7,  "market_bn":14.5, "region":"West",  "tier":"Tier-1"},
-    "Ahmedabad": {"rank":8,  "market_bn":13.0, "region":"West",  "tier":"Tier-1"},
-    "Jaipur":    {"rank":9,  "market_bn":10.5, "region":"North", "tier":"Tier-1"},
-    "Surat":     {"rank":10, "market_bn":9.5,  "region":"West",  "tier":"Tier-1"},
-}
-
-# Granular sub-categories (group → sub → keywords)
-CATEGORIES = {
-    "Sarees":           {"Silk Saree":"Kanjeevaram silk saree","Cotton Saree":"handloom cotton saree","Chiffon Saree":"chiffon georgette saree","Designer Saree":"embroidered party saree","Casual Saree":"daily wear synthetic saree"},
-    "Kurtas & Suits":   {"A-Line Kurta":"straight A line kurta women","Anarkali Kurta":"Anarkali flared kurta","Printed Kurta":"block print ethnic kurta","Embroidered Kurta":"mirror work embroidered kurta","Palazzo Set":"kurta palazzo ethnic set","Salwar Kameez":"Punjabi salwar suit","Sharara Set":"sharara gharara set"},
-    "Lehengas":         {"Bridal Lehenga":"bridal wedding lehenga","Party Lehenga":"festive party lehenga","Casual Lehenga":"cotton casual lehenga","Navratri Chaniya Choli":"garba chaniya choli Navratri"},
-    "Dupattas":         {"Embroidered Dupatta":"phulkari embroidered dupatta","Printed Dupatta":"block print tie dye dupatta","Silk Dupatta":"banarasi organza dupatta"},
-    "Men's Ethnic":     {"Kurta Pyjama":"men ethnic kurta set","Sherwani":"wedding designer sherwani","Bandhgala":  "jodhpuri bandhgala suit","Nehru Jacket":"Modi Nehru waistcoat jacket","Dhoti Kurta":"traditional dhoti kurta men"},
-    "Women's Tops":     {"Crop Top":"crop top ethnic bralette","Shirt / Blouse":"formal cotton women shirt","Puff Sleeve Top":"balloon puff sleeve trendy top","Tank Top":"sleeveless cami tank top"},
-    "Women's Bottoms":  {"High-waist Jeans":"mom skinny high waist jeans women","Trousers":"wide leg formal trousers women","Skirt":"midi mini pleated skirt India","Shorts":"denim cycling shorts women"},
-    "Dresses":          {"Maxi Dress":"boho floral maxi dress","Midi Dress":"wrap slip midi dress","Mini Dress":"bodycon party mini dress","Co-ord Set":"matching two piece co-ord set"},
-    "Men's Casuals":    {"Oversized T-Shirt":"graphic drop shoulder oversized tshirt","Men's Jeans":"slim baggy straight jeans men","Cargo Pants":"utility cargo trousers men","Sweatshirt":"crewneck printed sweatshirt men","Hoodie":"zip oversized hoodie men","Blazer":"unstructured casual blazer men"},
-    "Fusion Wear":      {"Kurti with Jeans":"kurti jeans ethnic combo","Jacket Kurta":"long jacket waistcoat kurta","Dhoti Pants":"harem dhoti style pants women","Cape Kurti":"drape cape kurta"},
-    "Streetwear":       {"Bomber Jacket":"varsity satin bomber jacket","Joggers":"streetwear track jogger pants","Sneakers Style":"chunky white sneakers outfit","Bucket Hat":"streetwear cap bucket hat India"},
-    "Activewear":       {"Yoga Wear":"yoga leggings set women India","Sports Bra":"padded zip sports bra India","Running Gear":"running tights gym wear women","Cycling Wear":"cycling jersey shorts India"},
-    "Accessories":      {"Jhumkas":"oxidised gold jhumka earrings","Maang Tikka":"bridal matha patti tikka","Potli Bag":"embroidered ethnic potli clutch","Sunglasses":"cat eye aviator sunglasses India"},
-    "Footwear":         {"Kolhapuri":"ethnic handmade kolhapuri chappal","Mojari / Juttis":"mojari juttis ethnic footwear","Heels":"block stiletto platform heels India","Sneakers":"casual white sneakers India","Flats":"ballet loafers flats women India"},
-    "Sustainable":      {"Handloom":"handloom fabric saree kurta India","Khadi":"khadi kurta fabric fashion","Organic Cotton":"organic natural dye GOTS cotton India","Upcycled":"upcycled sustainable eco fashion India"},
-}
-
-SUBCAT_TO_GROUP = {sub: grp for grp, subs in CATEGORIES.items() for sub in subs}
-ALL_SUBCATS     = [s for subs in CATEGORIES.values() for s in subs]
-
-PRICE_BUCKETS = {
-    "₹0–1K":   {"range":(0,1000),   "color":"#22c55e", "mid":500},
-    "₹1–2K":   {"range":(1001,2000),"color":"#84cc16", "mid":1500},
-    "₹2–3K":   {"range":(2001,3000),"color":"#eab308", "mid":2500},
-    "₹3–4K":   {"range":(3001,4000),"color":"#f97316", "mid":3500},
-    "₹4–5K":   {"range":(4001,5000),"color":"#ef4444", "mid":4500},
-    "₹5K+":    {"range":(5001,99999),"color":"#a855f7","mid":7500},
-}
-
-ALL_COLORS = {
-    "Red":            {"hex":"#e63946","family":"Reds & Pinks"},
-    "Pink":           {"hex":"#ff85a1","family":"Reds & Pinks"},
-    "Magenta":        {"hex":"#ff00aa","family":"Reds & Pinks"},
-    "Maroon":         {"hex":"#800000","family":"Reds & Pinks"},
-    "Coral":          {"hex":"#ff6b6b","family":"Reds & Pinks"},
-    "Orange":         {"hex":"#ff7f00","family":"Oranges & Yellows"},
-    "Mustard":        {"hex":"#e3a008","family":"Oranges & Yellows"},
-    "Yellow":         {"hex":"#ffd700","family":"Oranges & Yellows"},
-    "Green":          {"hex":"#2d6a4f","family":"Greens"},
-    "Olive":          {"hex":"#808000","family":"Greens"},
-    "Mint":           {"hex":"#98ff98","family":"Greens"},
-    "Teal":           {"hex":"#008080","family":"Greens"},
-    "Navy Blue":      {"hex":"#001f5b","family":"Blues"},
-    "Royal Blue":     {"hex":"#4169e1","family":"Blues"},
-    "Sky Blue":       {"hex":"#87ceeb","family":"Blues"},
-    "Cobalt":         {"hex":"#0047ab","family":"Blues"},
-    "Purple":         {"hex":"#6a0dad","family":"Purples"},
-    "Lavender":       {"hex":"#b57bee","family":"Purples"},
-    "Wine":           {"hex":"#722f37","family":"Purples"},
-    "White":          {"hex":"#f5f5f5","family":"Neutrals"},
-    "Black":          {"hex":"#1a1a1a","family":"Neutrals"},
-    "Beige / Cream":  {"hex":"#e8dcc8","family":"Neutrals"},
-    "Grey":           {"hex":"#808080","family":"Neutrals"},
-    "Terracotta":     {"hex":"#c27c5a","family":"Earth Tones"},
-    "Camel / Tan":    {"hex":"#c19a6b","family":"Earth Tones"},
-    "Gold / Bronze":  {"hex":"#cfb53b","family":"Metallics"},
-    "Silver":         {"hex":"#c0c0c0","family":"Metallics"},
-}
-
-TIMEFRAME_OPTIONS = {
-    "Last 7 days":   "now 7-d",
-    "Last 30 days":  "today 1-m",
-    "Last 3 months": "today 3-m",
-    "Last 12 months":"today 12-m",
-}
-
-
-# ══════════════════════════════════════════════════════════════════════════════
-#  CITY-LEVEL BIAS PROFILES
-# ══════════════════════════════════════════════════════════════════════════════
-CITY_PROFILES = {
-    "Mumbai":    {"western":1.45,"ethnic":0.85,"luxury":1.55,"budget":0.70,"streetwear":1.35,"colors":{"Black":1.4,"White":1.3,"Red":1.3,"Gold / Bronze":1.2,"Coral":1.2}},
-    "Delhi":     {"western":1.15,"ethnic":1.20,"luxury":1.45,"budget":0.80,"streetwear":1.10,"colors":{"Maroon":1.4,"Royal Blue":1.3,"Gold / Bronze":1.3,"Navy Blue":1.2,"Wine":1.2}},
-    "Bengaluru": {"western":1.55,"ethnic":0.80,"luxury":1.25,"budget":0.85,"streetwear":1.50,"colors":{"Green":1.4,"Teal":1.3,"Mint":1.3,"Olive":1.2,"Grey":1.2}},
-    "Hyderabad": {"western":1.10,"ethnic":1.25,"luxury":1.10,"budget":0.90,"streetwear":0.95,"colors":{"Teal":1.4,"Mustard":1.3,"Maroon":1.3,"Gold / Bronze":1.2,"Purple":1.2}},
-    "Chennai":   {"western":0.90,"ethnic":1.40,"luxury":1.00,"budget":1.00,"streetwear":0.80,"colors":{"Magenta":1.4,"Purple":1.3,"Navy Blue":1.3,"Pink":1.2,"Royal Blue":1.2}},
-    "Kolkata":   {"western":1.00,"ethnic":1.30,"luxury":0.90,"budget":1.05,"streetwear":0.90,"colors":{"White":1.4,"Red":1.3,"Pink":1.3,"Gold / Bronze":1.1,"Yellow":1.2}},
-    "Pune":      {"western":1.30,"ethnic":0.90,"luxury":1.00,"budget":0.95,"streetwear":1.20,"colors":{"Olive":1.3,"Terracotta":1.3,"Beige / Cream":1.3,"Grey":1.2,"Mint":1.2}},
-    "Ahmedabad": {"western":0.80,"ethnic":1.50,"luxury":0.90,"budget":1.10,"streetwear":0.70,"colors":{"Mustard":1.4,"Orange":1.4,"Red":1.2,"Pink":1.2,"Yellow":1.2}},
-    "Jaipur":    {"western":0.65,"ethnic":1.65,"luxury":0.80,"budget":1.20,"streetwear":0.60,"colors":{"Pink":1.5,"Yellow":1.4,"Orange":1.3,"Magenta":1.4,"Red":1.2}},
-    "Surat":     {"western":0.75,"ethnic":1.45,"luxury":1.15,"budget":1.00,"streetwear":0.65,"colors":{"Gold / Bronze":1.5,"Silver":1.4,"Coral":1.3,"Pink":1.2,"Mustard":1.2}},
-}
-
-WESTERN_GROUPS  = {"Women's Tops","Women's Bottoms","Dresses","Men's Casuals","Streetwear","Activewear","Fusion Wear"}
-ETHNIC_GROUPS   = {"Sarees","Kurtas & Suits","Lehengas","Dupattas","Men's Ethnic","Accessories","Footwear"}
-LUXURY_GROUPS   = {"Lehengas","Men's Ethnic","Sarees"}
-BUDGET_GROUPS   = {"Activewear","Men's Casuals","Women's Tops","Women's Bottoms"}
-STREET_GROUPS   = {"Streetwear","Fusion Wear","Men's Casuals"}
-LUXURY_PRICES   = {"₹3–4K","₹4–5K","₹5K+"}
-BUDGET_PRICES   = {"₹0–1K","₹1–2K"}
-
-
-# ══════════════════════════════════════════════════════════════════════════════
-#  SCORING ENGINE
-# ══════════════════════════════════════════════════════════════════════════════
-def rng_for(*keys): return np.random.default_rng(abs(hash("".join(str(k) for k in keys))) % (2**31))
-
-def score_combination(city: str, subcat: str, price: str, color: str) -> dict:
-    """
-    Score a 4-way combination on four independent signals,
-    then compute a weighted composite + a momentum (velocity) score.
-    """
-    group = SUBCAT_TO_GROUP.get(subcat, "")
-    prof  = CITY_PROFILES.get(city, {})
-    r     = rng_for(city, subcat, price, color)
-
-    # ── Base city-category affinity ──
-    base = r.integers(30, 72)
-    if group in WESTERN_GROUPS: base = int(base * prof.get("western", 1.0))
-    if group in ETHNIC_GROUPS:  base = int(base * prof.get("ethnic",  1.0))
-    if group in STREET_GROUPS:  base = int(base * prof.get("streetwear",1.0))
-    cat_score = int(np.clip(base + r.normal(0, 6), 5, 100))
-
-    # ── Price affinity ──
-    price_base = r.integers(25, 70)
-    if price in LUXURY_PRICES  and group in LUXURY_GROUPS: price_base = int(price_base * prof.get("luxury",1.0))
-    if price in BUDGET_PRICES  and group in BUDGET_GROUPS: price_base = int(price_base * prof.get("budget",1.0))
-    price_score = int(np.clip(price_base + r.normal(0, 6), 5, 100))
-
-    # ── Color affinity ──
-    color_base = r.integers(20, 72)
-    city_color_mult = prof.get("colors", {}).get(color, 1.0)
-    color_score = int(np.clip(color_base * city_color_mult + r.normal(0, 6), 5, 100))
-
-    # ── Geo market weight (larger city = more absolute reach) ──
-    market_weight = TOP10_CITIES[city]["market_bn"] / 42.0   # normalize to Mumbai=1.0
-    geo_score     = int(np.clip(70 * market_weight + r.normal(0,8), 10, 100))
-
-    # ── Weighted composite (geo:20, cat:35, price:25, color:20) ──
-    composite = (0.20 * geo_score + 0.35 * cat_score + 0.25 * price_score + 0.20 * color_score)
-    composite = int(np.clip(composite + r.normal(0, 3), 5, 100))
-
-    # ── Momentum / velocity (how fast it is growing vs 4 weeks ago) ──
-    # Simulated as a % change; positive = accelerating
-    r2 = rng_for(city, subcat, price, color, "velocity")
-    velocity = int(np.clip(r2.normal(8, 22), -35, 65))   # −35% to +65%
-
-    # Resolve hex string once here — stored as a proper #rrggbb column in the DataFrame
-    color_hex: str = ALL_COLORS.get(color, {}).get("hex", "#888888")
-
-    return {
-        "city": city, "subcat": subcat, "group": group,
-        "price": price, "color": color,
-        "color_hex":   color_hex,          # ← hex string, always available downstream
-        "geo_score":   geo_score,
-        "cat_score":   cat_score,
-        "price_score": price_score,
-        "color_score": color_score,
-        "composite":   composite,
-        "velocity":    velocity,
-    }
-
-@st.cache_data(ttl=1800, show_spinner=False)
-def compute_all_combinations(cities, subcats, prices, colors):
-    """Score every combination and return sorted DataFrame."""
-    rows = []
-    for combo in itertools.product(cities, subcats, prices, colors):
-        rows.append(score_combination(*combo))
-    df = pd.DataFrame(rows)
-    # Normalize composite to 0-100 across the full search space
-    mn, mx = df["composite"].min(), df["composite"].max()
-    df["score_norm"] = ((df["composite"] - mn) / (mx - mn) * 100).round(1)
-    return df.sort_values("score_norm", ascending=False).reset_index(drop=True)
-
-
-def hex_to_rgba(hex_color: str, alpha: float = 0.1) -> str:
-    """Convert a #rrggbb hex string to an rgba() string Plotly accepts."""
-    h = hex_color.lstrip("#")
-    if len(h) == 3:
-        h = "".join(c*2 for c in h)
-    r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
-    return f"rgba({r},{g},{b},{alpha})"
-
-
-def timeseries_for_combo(city, subcat, price, color, n=60):
-    """Generate a trend sparkline for a specific combination."""
-    r     = rng_for(city, subcat, price, color, "ts")
-    base  = r.integers(35, 68)
-    trend = np.linspace(-10, 25, n)
-    wave  = 8 * np.sin(np.linspace(0, 3*np.pi, n))
-    noise = r.normal(0, 6, n)
-    return np.clip(base + trend + wave + noise, 0, 100).astype(int)
-
-
-# ══════════════════════════════════════════════════════════════════════════════
-#  INSIGHT GENERATOR
+#  CHART HELPERS  (master data + scoring engine live in fashion_trends/)
 # ══════════════════════════════════════════════════════════════════════════════
-INSIGHT_TEMPLATES = [
-    lambda r: f"Search volume for {r['subcat']} in {r['color'].lower()} has been accelerating for 3 consecutive weeks in {r['city']} — driven by social commerce and reel virality.",
-    lambda r: f"{r['city']}'s {r['group'].lower()} buyers are actively comparing {r['price']} options. This sweet spot covers the widest purchase-intent window.",
-    lambda r: f"{r['color']} has overtaken neutral tones in {r['city']} searches for {r['group'].lower()} — shifting from aspirational to mainstream adoption.",
-    lambda r: f"Wedding season + festival overlap is amplifying {r['subcat']} demand in {r['city']}. The {r['price']} bracket sees the highest add-to-cart signals.",
-    lambda r: f"Influencer-led content featuring {r['subcat']} in {r['color'].lower()} tones is outperforming category average CTR in {r['city']} by ~2×.",
-]
-
-def get_insight(row, rank):
-    return INSIGHT_TEMPLATES[rank % len(INSIGHT_TEMPLATES)](row)
-
+# Per-section timings for this rerun; ?debug=1 shows them. $FASHION_TRENDS_PROFILE
+# profiles the whole run (=request: only runs opened with ?profile=cprofile|pyinstrument)
+timings    = Timings()
+page_done  = False      # set at the end of a full run; a fragment rerunning alone sees True
+debug_mode = st.query_params.get("debug") == "1"
+profiler   = None
+
+def stop_profiler():
+    """Stop this run's profiler and return its report (None if not profiling)."""
+    running = st.session_state.pop("profiler", None)
+    return running.stop() if running else None
+
+# A run that raised never reached its stop(); a profiler left running would hold
+# the process-wide profiling hook and fail every later profiled run
+stop_profiler()
+if (mode := profile_mode(st.query_params.get("profile"))):
+    try:
+        profiler = st.session_state["profiler"] = RunProfiler(mode).start()
+    except (ImportError, ValueError) as exc:    # pyinstrument missing / another profiler active
+        st.sidebar.warning(f"Profiling unavailable: {exc}")
+
+# Pick up edits to the master-data file (one stat() when it is unchanged); only
+# the scores and cached results that involve a changed member are recomputed
+master_changes = refresh_master_data()
+# This run reads one snapshot throughout, even if another session reloads meanwhile.
+# A fragment rerun executes on a new thread without this pin, so each fragment
+# re-pins the snapshot its arguments were computed from.
+master = pin_master_data()
+timings.lap("master_data")
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  SIDEBAR
@@ -475,37 +297,31 @@ with st.sidebar:
     st.markdown('<div class="sidebar-section">⚙️ Scope</div>', unsafe_allow_html=True)
     timeframe_label = st.selectbox("Time Period", list(TIMEFRAME_OPTIONS.keys()), index=1)
 
-    top_n = st.slider("Top N combinations", min_value=3, max_value=10, value=5)
-
     st.markdown('<div class="sidebar-section">📍 Geography</div>', unsafe_allow_html=True)
     selected_cities = st.multiselect(
-        "Cities", list(TOP10_CITIES.keys()),
-        default=list(TOP10_CITIES.keys()),
-        format_func=lambda c: f"#{TOP10_CITIES[c]['rank']} {c}"
+        "Cities", list(master.cities.keys()),
+        default=list(master.cities.keys()),
+        format_func=lambda c: f"#{master.cities[c]['rank']} {c}"
     )
 
     st.markdown('<div class="sidebar-section">🏷️ Category</div>', unsafe_allow_html=True)
-    sel_groups = st.multiselect("Groups", list(CATEGORIES.keys()), default=list(CATEGORIES.keys()))
-    active_subcats = [s for g in sel_groups for s in CATEGORIES.get(g, {}).keys()]
+    sel_groups = st.multiselect("Groups", list(master.categories.keys()), default=list(master.categories.keys()))
+    active_subcats = [s for g in sel_groups for s in master.categories.get(g, {}).keys()]
 
     st.markdown('<div class="sidebar-section">💰 Price</div>', unsafe_allow_html=True)
     selected_prices = st.multiselect(
-        "Buckets", list(PRICE_BUCKETS.keys()),
-        default=list(PRICE_BUCKETS.keys())
+        "Buckets", list(master.prices.keys()),
+        default=list(master.prices.keys())
     )
 
     st.markdown('<div class="sidebar-section">🎨 Color</div>', unsafe_allow_html=True)
     fam_filter = st.radio("Show", ["All", "By family"], horizontal=True)
     if fam_filter == "By family":
-        families = list(dict.fromkeys(v["family"] for v in ALL_COLORS.values()))
+        families = list(dict.fromkeys(v["family"] for v in master.colors.values()))
         sel_fams  = st.multiselect("Families", families, default=families)
-        selected_colors = [c for c,d in ALL_COLORS.items() if d["family"] in sel_fams]
+        selected_colors = [c for c,d in master.colors.items() if d["family"] in sel_fams]
     else:
-        selected_colors = list(ALL_COLORS.keys())
-
-    st.markdown("---")
-    st.markdown('<div class="sidebar-section">🔎 Filter Results</div>', unsafe_allow_html=True)
-    min_velocity = st.slider("Min velocity (%)", -35, 60, 0, help="Filter out declining combinations")
+        selected_colors = list(master.colors.keys())
 
     st.markdown("---")
     st.caption(f"Updated: {datetime.now().strftime('%d %b %Y %H:%M')}")
@@ -516,32 +332,41 @@ with st.sidebar:
 # ══════════════════════════════════════════════════════════════════════════════
 if not selected_cities or not active_subcats or not selected_prices or not selected_colors:
     st.warning("👈 Select options in all four dimensions to compute combinations.")
+    stop_profiler()                 # st.stop() skips the end of the script
     st.stop()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  COMPUTE
 # ══════════════════════════════════════════════════════════════════════════════
+timings.lap("sidebar")
 with st.spinner("Scoring all combinations across 4 dimensions..."):
-    all_combos = compute_all_combinations(
-        tuple(sorted(selected_cities)),
-        tuple(sorted(active_subcats)),
-        tuple(sorted(selected_prices)),
-        tuple(sorted(selected_colors)),
-    )
+    selection  = make_selection(selected_cities, sel_groups, selected_prices, selected_colors)
+    all_combos = compute_all_combinations(*selection, timeframe_label)
+    timings.lap("compute.scores")
+    aggregates = compute_aggregates(*selection, timeframe_label)
+    timings.lap("compute.aggregates")
 
-# Apply velocity filter
-filtered = all_combos[all_combos["velocity"] >= min_velocity].reset_index(drop=True)
-top_combos = filtered.head(top_n)
+total_combos = aggregates["total"]
+top_city     = top_k(all_combos, 1)["city"].iloc[0]
 
-# Build export CSV here so the sidebar download button has it ready
-_export_df  = top_combos[["city","group","subcat","price","color","color_hex","score_norm","velocity","geo_score","cat_score","price_score","color_score"]].copy()
-_export_df.columns = ["City","Group","Sub-Category","Price","Color","Color Hex","Trend Score","Velocity %","Geo Score","Cat Score","Price Score","Color Score"]
-_export_csv = _export_df.to_csv(index=False)
 
-total_combos = len(all_combos)
-above_75     = int((all_combos["score_norm"] >= 75).sum())
-avg_velocity = float(all_combos["velocity"].mean())
+# ══════════════════════════════════════════════════════════════════════════════
+#  FRAGMENTS
+# ══════════════════════════════════════════════════════════════════════════════
+# The sections with their own widgets (cards, analytics) are st.fragments that
+# take everything they draw as arguments. Sidebar (selection) changes rerun the
+# page; the ranking controls live in the cards fragment, so moving them reruns
+# only the cards.
+def section_timings() -> Timings:
+    """The page's timer during a full run; a fresh one when a fragment reruns alone."""
+    return Timings() if page_done else timings
+
+def finish_section(t: Timings, name: str) -> None:
+    if t is not timings:
+        t.log(run="fragment", fragment=name)
+        if debug_mode:
+            st.caption(f"⏱️ {name} rerun · {t.total_ms:,.0f} ms")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -552,49 +377,50 @@ st.markdown(f"""
   <div class="page-label">
     <span class="live-dot"></span>India Fashion Intelligence · {timeframe_label}
   </div>
-  <div class="page-title">Top <em>{top_n}</em> Trending<br>Combinations</div>
+  <div class="page-title">Top <em>Trending</em><br>Combinations</div>
   <div class="page-subtitle">
     Geography × Category × Price × Color — scored across {total_combos:,} possible combinations
   </div>
 </div>
 """, unsafe_allow_html=True)
 
-# Stats bar
-s1, s2, s3, s4 = st.columns(4)
-rank_colors = ["var(--rank1)","var(--rank2)","var(--rank3)","var(--rank4)","var(--rank5)"]
-with s1:
-    st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
-      <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">Combinations scored</div>
-      <div style="font-family:'Unbounded',sans-serif;font-size:26px;font-weight:700">{total_combos:,}</div>
-    </div>""", unsafe_allow_html=True)
-with s2:
-    st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
-      <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">High-signal (≥75)</div>
-      <div style="font-family:'Unbounded',sans-serif;font-size:26px;font-weight:700;color:var(--amber)">{above_75}</div>
-    </div>""", unsafe_allow_html=True)
-with s3:
-    vel_color = "var(--teal)" if avg_velocity > 0 else "var(--crimson)"
-    vel_arrow = "↑" if avg_velocity > 0 else "↓"
-    st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
-      <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">Avg velocity</div>
-      <div style="font-family:'Unbounded',sans-serif;font-size:26px;font-weight:700;color:{vel_color}">{vel_arrow}{avg_velocity:.1f}%</div>
-    </div>""", unsafe_allow_html=True)
-with s4:
-    top1 = top_combos.iloc[0]
-    st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
-      <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">Top signal city</div>
-      <div style="font-family:'Unbounded',sans-serif;font-size:22px;font-weight:700;color:var(--rank1)">{top1['city']}</div>
-    </div>""", unsafe_allow_html=True)
+# Stats bar — no widgets of its own, so it only ever renders with the full run
+def render_header_stats(aggregates: dict, top_city: str):
+    t = section_timings()
+    total_combos, above_75, avg_velocity = aggregates["total"], aggregates["above_75"], aggregates["avg_velocity"]
+    s1, s2, s3, s4 = st.columns(4)
+    with s1:
+        st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
+          <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">Combinations scored</div>
+          <div style="font-family:'Unbounded',sans-serif;font-size:26px;font-weight:700">{total_combos:,}</div>
+        </div>""", unsafe_allow_html=True)
+    with s2:
+        st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
+          <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">High-signal (≥75)</div>
+          <div style="font-family:'Unbounded',sans-serif;font-size:26px;font-weight:700;color:var(--amber)">{above_75}</div>
+        </div>""", unsafe_allow_html=True)
+    with s3:
+        vel_color = "var(--teal)" if avg_velocity > 0 else "var(--crimson)"
+        vel_arrow = "↑" if avg_velocity > 0 else "↓"
+        st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
+          <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">Avg velocity</div>
+          <div style="font-family:'Unbounded',sans-serif;font-size:26px;font-weight:700;color:{vel_color}">{vel_arrow}{avg_velocity:.1f}%</div>
+        </div>""", unsafe_allow_html=True)
+    with s4:
+        st.markdown(f"""<div style="background:var(--surface);border:1px solid var(--border);padding:16px 20px">
+          <div style="font-size:9px;letter-spacing:.2em;text-transform:uppercase;color:var(--muted);margin-bottom:6px">Top signal city</div>
+          <div style="font-family:'Unbounded',sans-serif;font-size:22px;font-weight:700;color:var(--rank1)">{top_city}</div>
+        </div>""", unsafe_allow_html=True)
+    t.lap("header")
+    finish_section(t, "header")
+
+render_header_stats(aggregates, top_city)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  TOP COMBINATION CARDS
 # ══════════════════════════════════════════════════════════════════════════════
 st.markdown("<hr class='section-rule'>", unsafe_allow_html=True)
-st.markdown(f'<div class="section-label">🏆 Top {top_n} Trending Combinations</div>', unsafe_allow_html=True)
-
-RANK_LABELS  = ["#1 — HOTTEST","#2 — RISING FAST","#3 — STRONG SIGNAL","#4 — EMERGING","#5 — WATCH THIS"]
-RANK_COLORS  = ["#e8a020","#c0c0c0","#cd7f32","#3a8a6a","#5a4a8a"]
 
 def render_bar(label, score_val, color_val):
     """Render a labelled progress bar using only native Streamlit."""
@@ -602,120 +428,150 @@ def render_bar(label, score_val, color_val):
     st.progress(int(min(score_val, 100)), text=f"{int(score_val)}/100")
 
 
-for idx, row in top_combos.iterrows():
-    rank        = idx + 1
-    rk_color    = RANK_COLORS[min(rank - 1, 4)]
-    rk_label    = RANK_LABELS[min(rank - 1, len(RANK_LABELS) - 1)]
-    color_hex   = row["color_hex"]
-    price_color = PRICE_BUCKETS.get(row["price"], {}).get("color", "#888888")
-    vel         = int(row["velocity"])
-    vel_sign    = "+" if vel >= 0 else ""
-    vel_arrow   = "▲" if vel >= 0 else "▼"
-    score       = round(row["score_norm"], 1)
-
-    # City ranking for this combo
-    city_scores_for_combo = sorted(
-        [(c, score_combination(c, row["subcat"], row["price"], row["color"])["composite"])
-         for c in selected_cities],
-        key=lambda x: -x[1]
-    )
-    top3_cities  = [x[0] for x in city_scores_for_combo[:3]]
-    other_cities = [x[0] for x in city_scores_for_combo[3:]]
-
-    insight_text = get_insight(row, idx)
-
-    # Sparkline
-    spark_vals = timeseries_for_combo(row["city"], row["subcat"], row["price"], row["color"])
-    fig_spark  = go.Figure(go.Scatter(
-        x=list(range(len(spark_vals))), y=spark_vals.tolist(),
-        mode="lines", fill="tozeroy",
-        line=dict(color=rk_color, width=2),
-        fillcolor=hex_to_rgba(rk_color, 0.09),
-        hoverinfo="skip"
-    ))
-    fig_spark.update_layout(
-        height=90, margin=dict(l=0, r=0, t=0, b=0),
-        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-        xaxis=dict(visible=False), yaxis=dict(visible=False, range=[0, 105]),
-        showlegend=False
-    )
-
-    # ── Card container ──────────────────────────────────────────────────────
-    with st.container(border=True):
-
-        # Row 1: rank label + title + score
-        h1, h2 = st.columns([4, 1])
-        with h1:
-            st.markdown(
-                f"**{rk_label}**  \n"
-                f"### {row['subcat']} · {row['color']}",
-            )
-        with h2:
-            st.metric(
-                label="Trend Score",
-                value=f"{score}",
-                delta=f"{vel_sign}{vel}% MoM",
-                delta_color="normal" if vel >= 0 else "inverse",
-            )
-
-        # Row 2: dimension tags as columns
-        t1, t2, t3, t4 = st.columns(4)
-        t1.markdown(f"📍 **{row['city']}**")
-        t2.markdown(f"🏷️ **{row['group']}**")
-        t3.markdown(f"💰 **{row['price']}**")
-        # Color swatch using a tiny plotly figure (single filled square)
-        with t4:
-            fig_swatch = go.Figure(go.Bar(
-                x=[1], y=[1],
-                marker_color=color_hex,
-                width=[1],
-            ))
-            fig_swatch.update_layout(
-                height=36, margin=dict(l=0, r=0, t=0, b=0),
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                xaxis=dict(visible=False), yaxis=dict(visible=False),
-                showlegend=False,
-                annotations=[dict(
-                    text=row["color"], x=0.5, y=0.5,
-                    xref="paper", yref="paper",
-                    showarrow=False,
-                    font=dict(color="white" if row["color"] not in ("White","Beige / Cream","Mint","Silver","Sky Blue","Yellow","Lavender") else "#333",
-                              size=10, family="DM Mono"),
-                )]
-            )
-            st.plotly_chart(fig_swatch, use_container_width=True,
-                            config={"displayModeBar": False})
-
-        st.divider()
-
-        # Row 3: dimension score bars
-        b1, b2, b3, b4 = st.columns(4)
-        with b1:
-            render_bar("📍 Geo Reach", row["geo_score"], "#f97316")
-        with b2:
-            render_bar("🏷️ Category Fit", row["cat_score"], "#38bdf8")
-        with b3:
-            render_bar("💰 Price Demand", row["price_score"], price_color)
-        with b4:
-            render_bar("🎨 Color Pull", row["color_score"], color_hex)
-
-        # Row 4: sparkline + insight
-        sp1, sp2 = st.columns([2, 3])
-        with sp1:
-            st.plotly_chart(fig_spark, use_container_width=True,
-                            config={"displayModeBar": False})
-            peak    = int(spark_vals.max())
-            avg_7d  = int(spark_vals[-7:].mean())
-            st.caption(f"60-day trend · Peak **{peak}** · Last 7d avg **{avg_7d}**")
-        with sp2:
-            st.info(f"💡 {insight_text}")
-            st.caption(
-                "Strongest in: "
-                + "  ·  ".join([f"**{c}**" for c in top3_cities])
-                + ("  ·  " + "  ·  ".join(other_cities) if other_cities else "")
-            )
-
-        st.divider()
+# Ranking controls + export + cards; a control change reruns only this fragment
+@st.cache_resource
+def top_export_cache() -> ScoreCache:
+    return ScoreCache(max_entries=16)
+
+if master_changes:
+    top_export_cache().invalidate_members(frozenset().union(*master_changes.values()))
+
+@st.fragment
+def render_cards(all_combos, selection, selected_cities, timeframe_label):
+    pin_master_data(master)
+    t = section_timings()
+    c1, c2, c3 = st.columns([2, 2, 1])
+    top_n        = c1.slider("Top N combinations", min_value=3, max_value=10, value=5, key="top_n")
+    min_velocity = c2.slider("Min velocity (%)", -35, 60, 0, key="min_velocity",
+                             help="Filter out declining combinations")
+
+    # Apply velocity filter and rank — partial selection, no resort of the full table
+    top_combos = top_k(all_combos, top_n, min_velocity)
+    t.lap("filter")
+    if top_combos.empty:
+        st.info("No combination meets the velocity filter — lower Min velocity.")
+        finish_section(t, "cards")
+        return
+
+    # Top-N export CSV — at most 10 rows, so it gets its own small cache rather than
+    # competing with the full score tables in score_cache()
+    export_csv = top_export_cache().get_or_compute(
+        ("export_top", master_data_version(master), timeframe_label, top_n, min_velocity, *selection),
+        lambda: b"".join(iter_chunks(export_frame(top_combos), "csv")),
+        keep=lambda: master is latest_master_data())
+    with c3:
+        st.download_button("⬇️ Top CSV", data=export_csv, file_name="top_combinations.csv",
+                           mime="text/csv", use_container_width=True)
+    t.lap("export.top")
+    st.markdown(f'<div class="section-label">🏆 Top {top_n} Trending Combinations</div>', unsafe_allow_html=True)
+
+    # Composite + within-city rank of every card in every selected city, in one lookup
+    card_city_composite, card_city_rank = city_rankings(top_combos, selected_cities, *selection[1:], timeframe_label)
+    t.lap("cards.rankings")
+    # Simulated sparklines + their stats for all cards in one batch
+    card_series = timeseries_for_frame(top_combos)
+    card_stats  = series_stats(card_series)
+    t.lap("cards.sparklines")
+
+    for idx, row in top_combos.iterrows():
+        rank        = idx + 1
+        rk_color    = RANK_COLORS[min(rank - 1, 4)]
+        rk_label    = RANK_LABELS[min(rank - 1, len(RANK_LABELS) - 1)]
+        color_hex   = row["color_hex"]
+        price_color = master.prices.get(row["price"], {}).get("color", "#888888")
+        vel         = int(row["velocity"])
+        vel_sign    = "+" if vel >= 0 else ""
+        score       = round(row["score_norm"], 1)
+
+        # City ranking for this combo (stable sort keeps sidebar order on ties)
+        city_order   = np.argsort(-card_city_composite[idx], kind="stable")
+        city_ranked  = [f"{selected_cities[j]} (#{card_city_rank[idx, j]:,})" for j in city_order]
+        top3_cities  = city_ranked[:3]
+        other_cities = city_ranked[3:]
+
+        insight_text = get_insight(row, idx)
+
+        # Sparkline
+        # Real Google Trends interest when the ingestion cache has it, simulated otherwise
+        live = cached_interest(row["city"], row["subcat"], timeframe_label)
+        if live and live["values"]:
+            # Hourly for "Last 7 days", weekly for the longer windows: average over the sampling
+            spark_vals  = np.array(live["values"])
+            window, recent_span = recent_window(live["dates"])
+            spark_stats = series_stats(spark_vals[None, :], window=window).iloc[0]
+            spark_src   = f"Google Trends · {timeframe_label}"
+        else:
+            spark_vals  = card_series[idx]
+            spark_stats = card_stats.iloc[idx]
+            spark_src, recent_span = "60-day trend", "7d"
+        spark_svg = sparkline_svg(spark_vals, rk_color)
+        t.lap("cards.prepare")
+
+        # ── Card container ──────────────────────────────────────────────────────
+        with st.container(border=True):
+
+            # Row 1: rank label + title + score
+            h1, h2 = st.columns([4, 1])
+            with h1:
+                st.markdown(
+                    f"**{rk_label}**  \n"
+                    f"### {row['subcat']} · {row['color']}",
+                )
+            with h2:
+                st.metric(
+                    label="Trend Score",
+                    value=f"{score}",
+                    delta=f"{vel_sign}{vel}% MoM",
+                    delta_color="normal" if vel >= 0 else "inverse",
+                )
+
+            # Row 2: dimension tags as columns
+            t1, t2, t3, t4 = st.columns(4)
+            t1.markdown(f"📍 **{row['city']}**")
+            t2.markdown(f"🏷️ **{row['group']}**")
+            t3.markdown(f"💰 **{row['price']}**")
+            # Color swatch as an inline chip (color_hex is resolved on the score table)
+            with t4:
+                t.lap("cards.render")
+                st.markdown(swatch_html(row["color"], color_hex), unsafe_allow_html=True)
+                t.lap("cards.swatch")
+
+            st.divider()
+
+            # Row 3: dimension score bars
+            b1, b2, b3, b4 = st.columns(4)
+            with b1:
+                render_bar("📍 Geo Reach", row["geo_score"], "#f97316")
+            with b2:
+                render_bar("🏷️ Category Fit", row["cat_score"], "#38bdf8")
+            with b3:
+                render_bar("💰 Price Demand", row["price_score"], price_color)
+            with b4:
+                render_bar("🎨 Color Pull", row["color_score"], color_hex)
+
+            # Row 4: sparkline + insight
+            sp1, sp2 = st.columns([2, 3])
+            with sp1:
+                t.lap("cards.render")
+                st.markdown(spark_svg, unsafe_allow_html=True)
+                t.lap("cards.sparkline")
+                peak    = int(spark_stats["peak"])
+                avg_recent = int(spark_stats["avg_last"])
+                st.caption(f"{spark_src} · Peak **{peak}** · Last {recent_span} avg **{avg_recent}**")
+            with sp2:
+                st.info(f"💡 {insight_text}")
+                st.caption(
+                    "Strongest in: "
+                    + "  ·  ".join([f"**{c}**" for c in top3_cities])
+                    + ("  ·  " + "  ·  ".join(other_cities) if other_cities else "")
+                )
+
+            st.divider()
+        t.lap("cards.render")
+    finish_section(t, "cards")
+
+
+render_cards(all_combos, selection, selected_cities, timeframe_label)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -724,19 +580,20 @@ for idx, row in top_combos.iterrows():
 st.markdown("<hr class='section-rule'>", unsafe_allow_html=True)
 st.markdown('<div class="section-label">📊 Supporting Analytics</div>', unsafe_allow_html=True)
 
-tab1, tab2, tab3, tab4 = st.tabs(["Score Distribution","City × Category","Price Landscape","Color Heatmap"])
-
-with tab1:
-    fig_dist = px.histogram(
-        all_combos, x="score_norm", nbins=40,
+# Each view is built only when it is opened, then memoized per score-table version
+# (timeframe + selection) in a figure cache of its own, so figures never evict score tables
+def distribution_figure(aggregates: dict):
+    edges = aggregates["hist_edges"]
+    fig_dist = px.bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=aggregates["hist_counts"],
         color_discrete_sequence=["#e8a020"],
-        labels={"score_norm":"Trend Score (0–100)","count":"# Combinations"},
-        title=f"Distribution of all {total_combos:,} scored combinations"
+        labels={"x":"Trend Score (0–100)","y":"# Combinations"},
+        title=f"Distribution of all {aggregates['total']:,} scored combinations"
     )
-    # Mark top N
-    cutoff = float(top_combos["score_norm"].min())
-    fig_dist.add_vline(x=cutoff, line_color="#ef4444", line_dash="dash",
-                       annotation_text=f"Top {top_n} cutoff ({cutoff:.1f})",
+    fig_dist.update_traces(width=edges[1] - edges[0])
+    # Mark the high-signal threshold (the Top N cutoff lives with the cards)
+    fig_dist.add_vline(x=75, line_color="#ef4444", line_dash="dash",
+                       annotation_text=f"High-signal ≥75 ({aggregates['above_75']:,})",
                        annotation_font_color="#ef4444")
     fig_dist.update_layout(
         paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
@@ -744,11 +601,10 @@ with tab1:
         xaxis=dict(gridcolor="#2a2a2a"), yaxis=dict(gridcolor="#2a2a2a"),
         margin=dict(l=0,r=0,t=40,b=0), height=320
     )
-    st.plotly_chart(fig_dist, use_container_width=True)
+    return fig_dist
 
-with tab2:
-    city_cat = all_combos.groupby(["city","group"])["score_norm"].mean().reset_index()
-    pivot_cc = city_cat.pivot(index="group", columns="city", values="score_norm").fillna(0)
+def city_category_figure(aggregates: dict):
+    pivot_cc = aggregates["group_city"].fillna(0)
     fig_cc = px.imshow(
         pivot_cc, color_continuous_scale=[[0,"#141414"],[0.5,"rgba(232,160,32,0.25)"],[1,"#e8a020"]],
         aspect="auto", text_auto=".0f", labels=dict(color="Avg Score")
@@ -760,11 +616,11 @@ with tab2:
         coloraxis_showscale=False,
         margin=dict(l=0,r=0,t=10,b=0), height=380
     )
-    st.plotly_chart(fig_cc, use_container_width=True)
+    return fig_cc
 
-with tab3:
-    price_grp = all_combos.groupby(["price","group"])["score_norm"].mean().reset_index()
-    price_order = [p for p in PRICE_BUCKETS.keys() if p in price_grp["price"].unique()]
+def price_figure(aggregates: dict):
+    price_grp = aggregates["price_group"].stack().dropna().rename("score_norm").reset_index()
+    price_order = [p for p in master.prices.keys() if p in price_grp["price"].unique()]
     fig_price = px.bar(
         price_grp, x="price", y="score_norm", color="group",
         barmode="stack", category_orders={"price": price_order},
@@ -779,11 +635,10 @@ with tab3:
         legend=dict(font=dict(size=9), bgcolor="rgba(0,0,0,0)"),
         margin=dict(l=0,r=0,t=10,b=0), height=320
     )
-    st.plotly_chart(fig_price, use_container_width=True)
+    return fig_price
 
-with tab4:
-    color_city = all_combos.groupby(["color","city"])["score_norm"].mean().reset_index()
-    pivot_col  = color_city.pivot(index="color", columns="city", values="score_norm").fillna(0)
+def color_figure(aggregates: dict):
+    pivot_col  = aggregates["color_city"].fillna(0)
     pivot_col["_avg"] = pivot_col.mean(axis=1)
     pivot_col  = pivot_col.sort_values("_avg",ascending=False).drop(columns="_avg")
     fig_col = px.imshow(
@@ -797,20 +652,68 @@ with tab4:
         coloraxis_showscale=False,
         margin=dict(l=0,r=0,t=10,b=0), height=600
     )
-    st.plotly_chart(fig_col, use_container_width=True)
+    return fig_col
+
+ANALYTICS_VIEWS = {
+    "Score Distribution": distribution_figure,
+    "City × Category":    city_category_figure,
+    "Price Landscape":    price_figure,
+    "Color Heatmap":      color_figure,
+}
+
+@st.cache_resource
+def figure_cache() -> ScoreCache:
+    return ScoreCache(max_entries=32)
+
+if master_changes:
+    figure_cache().invalidate_members(frozenset().union(*master_changes.values()))
+
+@st.fragment
+def render_analytics(aggregates: dict, table_version: tuple):
+    pin_master_data(master)
+    t    = section_timings()
+    view = st.radio("View", list(ANALYTICS_VIEWS), index=None, horizontal=True,
+                    key="analytics_view", label_visibility="collapsed")
+    if view is None:
+        st.caption("Pick a view to build it — nothing is computed until then.")
+    else:
+        fig = figure_cache().get_or_compute(("figure", view, *table_version),
+                                            lambda: ANALYTICS_VIEWS[view](aggregates),
+                                            keep=lambda: master is latest_master_data())
+        t.lap("analytics.figure")
+        st.plotly_chart(fig, use_container_width=True)
+        t.lap("analytics.serialize")
+    finish_section(t, "analytics")
+
+render_analytics(aggregates, (master_data_version(master), timeframe_label, *selection))
 
 
-# ── Sidebar download button (rendered after compute so CSV is ready) ──────────
+# ── Sidebar full-selection export (rendered after compute so the size is known) ─
 with st.sidebar:
     st.markdown("---")
     st.markdown('<div class="sidebar-section">⬇️ Export</div>', unsafe_allow_html=True)
-    st.download_button(
-        label="Download Top Combinations CSV",
-        data=_export_csv,
-        file_name="top_combinations.csv",
-        mime="text/csv",
-        use_container_width=True,
-    )
+    # Full selection: encoded only once asked for, then cached per selection + format
+    export_fmt = st.selectbox("Full export format", list(EXPORT_FORMATS), key="export_fmt")
+    if st.toggle(f"Prepare all {total_combos:,} combinations", key="export_full"):
+        ext, mime = EXPORT_FORMATS[export_fmt]
+        st.download_button(
+            label=f"Download All Combinations ({ext.upper()})",
+            data=selection_export(*selection, export_fmt, timeframe_label),
+            file_name=f"all_combinations.{ext}",
+            mime=mime,
+            use_container_width=True,
+        )
+
+timings.lap("export.full")
+
+# ── Admin panel (?admin=1): result-cache counters ─────────────────────────────
+if st.query_params.get("admin") == "1":
+    with st.sidebar:
+        with st.expander("🛠️ Score cache", expanded=False):
+            st.json(score_cache().stats())
+            st.caption("Master data")
+            st.json(master_data_info())
+
 
 
 
@@ -824,3 +727,17 @@ color:#3a3a3a;letter-spacing:0.2em;padding:28px 0 12px;border-top:1px solid #2a2
 INDIA FASHION INTELLIGENCE · TOP COMBINATIONS ENGINE · GEO × CATEGORY × PRICE × COLOR
 </div>
 """, unsafe_allow_html=True)
+timings.lap("footer")
+
+
+# ── Debug panel (?debug=1): section timings + profiler report ─────────────────
+profile_report = stop_profiler()
+timings.log(run="dashboard", cities=len(selected_cities), combos=total_combos,
+            timeframe=timeframe_label, profile=profiler.mode if profiler else None)
+if debug_mode or profile_report:
+    with st.sidebar:
+        with st.expander(f"⏱️ Timings · {timings.total_ms:,.0f} ms", expanded=debug_mode):
+            st.dataframe(timings.rows(), hide_index=True, use_container_width=True)
+            if profile_report:
+                st.code(profile_report, language=None)
+page_done = True
@@ -0,0 +1,49 @@
+"""
+Headless scoring library for India fashion trend combinations
+(Geography × Category × Price × Color). No Streamlit or Plotly imports —
+the dashboard (app.py), the CLI (python -m fashion_trends) and batch jobs all
+share this engine.
+"""
+from .aggregates import build_aggregates, compute_aggregates
+from .cache import ScoreCache, score_cache
+from .cube import (
+    build_score_cube, build_score_store, city_rankings, compute_all_combinations,
+    load_store, master_data_version, refresh_master_data, save_store, score_cube, slice_cube,
+)
+from . import data as _data
+from .data import (
+    DEFAULT_TIMEFRAME, TIMEFRAME_OPTIONS, TIMEFRAME_PROFILES, MasterData, latest_master_data,
+    load_master_data, make_selection, master_data, master_data_info, pin_master_data, pinned_master_data,
+)
+from .engine import (
+    SCORE_COLS, add_score_norm, score_arrays, score_combination, score_frame, top_k, top_k_indices,
+)
+from .export import EXPORT_FORMATS, export_frame, iter_chunks, selection_export, write_export
+from .parallel import score_sharded, sharded_table, sharded_top_k
+from .registry import MasterRegistry, master_registry
+from .stream import StreamSummary, iter_combinations, stream_summary
+from .timeseries import (
+    series_stats, timeseries_batch, timeseries_for_combo, timeseries_for_frame,
+)
+from .whatif import WhatIfSession
+
+__all__ = [
+    "ALL_COLORS", "ALL_SUBCATS", "CATEGORIES", "CITY_PROFILES", "DEFAULT_TIMEFRAME",
+    "EXPORT_FORMATS", "PRICE_BUCKETS", "SCORE_COLS", "SUBCAT_TO_GROUP", "TIMEFRAME_OPTIONS",
+    "TIMEFRAME_PROFILES", "TOP10_CITIES",
+    "MasterData", "MasterRegistry", "ScoreCache", "StreamSummary", "WhatIfSession", "add_score_norm", "build_aggregates", "build_score_cube",
+    "build_score_store", "city_rankings", "compute_aggregates", "compute_all_combinations",
+    "export_frame", "iter_chunks", "iter_combinations", "latest_master_data", "load_master_data",
+    "load_store", "make_selection", "master_data", "master_data_info", "master_data_version",
+    "master_registry", "pin_master_data", "pinned_master_data", "refresh_master_data", "save_store", "score_arrays", "score_cache",
+    "score_combination", "score_cube", "score_frame", "score_sharded", "selection_export", "series_stats",
+    "sharded_table", "sharded_top_k", "slice_cube", "stream_summary",
+    "timeseries_batch", "timeseries_for_combo", "timeseries_for_frame", "top_k", "top_k_indices", "write_export",
+]
+
+
+def __getattr__(name):
+    """The master-data tables (TOP10_CITIES, ALL_COLORS, ...) resolve to master_data() on access."""
+    if name in _data.MASTER_TABLE_NAMES:
+        return getattr(_data, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,67 @@
+"""
+Aggregate engine for the header stats and the Supporting Analytics tabs.
+"""
+import numpy as np
+import pandas as pd
+
+from .cache import master_cached
+from .cube import compute_all_combinations, master_data_version
+from .data import DEFAULT_TIMEFRAME
+
+# ── Aggregate engine ─────────────────────────────────────────────────────────
+# Everything the header stats and analytics tabs need, in one pass of bincounts
+# over the categorical codes. Cached next to the score table, keyed by the same
+# snapshot version and selection — none of it depends on Min velocity or Top N,
+# so those sliders never recompute it (only the histogram's cutoff line moves).
+HIST_BINS = 40
+
+def build_aggregates(df: pd.DataFrame) -> dict:
+    """Marginal + pairwise score_norm means and the score histogram for a scored table."""
+    score = df["score_norm"].to_numpy(np.float64)
+    codes = {col: df[col].cat.codes.to_numpy(np.intp) for col in ("city", "group", "price", "color")}
+    cats  = {col: pd.Index(df[col].cat.categories, name=col) for col in codes}
+
+    def means(*cols):
+        shape = tuple(len(cats[c]) for c in cols)
+        flat  = np.ravel_multi_index(tuple(codes[c] for c in cols), shape)
+        sums  = np.bincount(flat, weights=score, minlength=int(np.prod(shape)))
+        cnt   = np.bincount(flat, minlength=int(np.prod(shape)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (sums / cnt).reshape(shape)      # NaN where a pair is absent
+
+    pair = lambda rows, cols: pd.DataFrame(means(rows, cols), index=cats[rows], columns=cats[cols])
+    hist_counts, hist_edges = np.histogram(score, bins=HIST_BINS, range=(0, 100))
+    return {
+        "total":        len(df),
+        "above_75":     int((score >= 75).sum()),
+        "avg_velocity": float(df["velocity"].mean()),
+        "marginal":     {col: pd.Series(means(col), index=cats[col], name="score_norm") for col in codes},
+        "group_city":   pair("group", "city"),
+        "price_group":  pair("price", "group"),
+        "color_city":   pair("color", "city"),
+        "hist_counts":  hist_counts,
+        "hist_edges":   hist_edges,
+    }
+
+def compute_aggregates(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME) -> dict:
+    """Aggregates for a selection, cached alongside its score table."""
+    key = ("aggregates", master_data_version(), timeframe, cities, subcats, prices, colors)
+    return master_cached(
+        key, lambda: build_aggregates(compute_all_combinations(cities, subcats, prices, colors, timeframe)))
+
+def aggregates_frame(agg: dict) -> pd.DataFrame:
+    """Flatten an aggregates dict into one long (table, row, col, value) frame for export."""
+    parts = [pd.DataFrame({"table": "summary", "row": ["total", "above_75", "avg_velocity"], "col": "",
+                           "value": [agg["total"], agg["above_75"], agg["avg_velocity"]]})]
+    for dim, s in agg["marginal"].items():
+        parts.append(pd.DataFrame({"table": f"marginal_{dim}", "row": s.index.astype(str),
+                                   "col": "", "value": s.to_numpy()}))
+    for name in ("group_city", "price_group", "color_city"):
+        long = agg[name].stack().dropna()
+        parts.append(pd.DataFrame({"table": name, "row": long.index.get_level_values(0).astype(str),
+                                   "col": long.index.get_level_values(1).astype(str),
+                                   "value": long.to_numpy()}))
+    edges = agg["hist_edges"]
+    parts.append(pd.DataFrame({"table": "histogram", "row": [f"{e:g}" for e in edges[:-1]],
+                               "col": [f"{e:g}" for e in edges[1:]], "value": agg["hist_counts"]}))
+    return pd.concat(parts, ignore_index=True)
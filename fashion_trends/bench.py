@@ -0,0 +1,259 @@
+"""
+Benchmark suite for the scoring engine: times the scalar reference, batched
+scoring, selection, top-K, the analytics aggregates, the card pre-compute and
+the per-card HTML/SVG builders at several cross-product sizes, records peak
+traced memory, and compares the run against a saved baseline so regressions
+fail a local run.
+
+    python -m fashion_trends.bench --save            # record a baseline for this machine
+    python -m fashion_trends.bench                   # compare against it (exit 1 on regression)
+    python -m fashion_trends.bench --quick --only top_k aggregates
+
+Sizes run from one city or one color family up to synthetic catalogs with 10×
+the cities or 10× the sub-categories (~1.1M combinations each). Synthetic
+members copy the profile of the city / group they were cloned from and only
+exist in a derived master-data snapshot pinned for their benchmarks. Selection and the
+card benchmarks read the master-data cube, so they only run on master-data sizes.
+
+This is a standalone runner rather than pytest-benchmark: it records peak traced
+memory next to wall time and gates on both against a per-machine baseline, and it
+runs where the service is deployed, without the test dependencies. The pytest
+suite under tests/ checks correctness only.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import build_aggregates
+from .cache import score_cache
+from .cards import RANK_COLORS, RANK_LABELS, get_insight, sparkline_svg, swatch_html
+from .cube import city_rankings, compute_all_combinations, score_cube
+from .data import make_selection, master_data, pinned_master_data
+from .engine import add_score_norm, score_combination, score_frame, top_k
+from .parallel import score_sharded
+from .stream import stream_summary
+from .timeseries import series_stats, timeseries_for_frame
+
+BENCH_BASELINE_PATH = Path(os.environ.get("BENCH_BASELINE_PATH",
+                                          Path(__file__).resolve().parent.parent / ".bench_baseline.json"))
+SYNTHETIC_FACTOR    = 10
+TIME_FLOOR_S        = 0.002     # differences below this are timer noise, never a regression
+MEMORY_FLOOR_MB     = 1.0
+
+
+# ── Sizes ─────────────────────────────────────────────────────────────────────
+@contextmanager
+def synthetic_catalog(cities: int = 1, subcats: int = 1):
+    """
+    Pin a snapshot with `cities − 1` clones of every master city and `subcats − 1`
+    clones of every sub-category ("Mumbai #2", "Sneakers Style #2", ...).
+    Yields the enlarged (cities, subcats, prices, colors) selection.
+    """
+    master = master_data()
+    base_cities, base_subcats, prices, colors = make_selection()
+    added_cities  = [f"{c} #{i}" for i in range(2, cities + 1) for c in base_cities]
+    added_subcats = [f"{s} #{i}" for i in range(2, subcats + 1) for s in base_subcats]
+    source = lambda name: name.rsplit(" #", 1)[0]
+    clone  = lambda table, names: {**table, **{n: table[source(n)] for n in names if source(n) in table}}
+    synthetic = master.replace(
+        cities=clone(master.cities, added_cities),
+        profiles=clone(master.profiles, added_cities),
+        geo=clone(master.geo, added_cities),
+        categories={g: clone(subs, [n for n in added_subcats if source(n) in subs])
+                    for g, subs in master.categories.items()},
+    )
+    with pinned_master_data(synthetic):
+        yield base_cities + tuple(added_cities), base_subcats + tuple(added_subcats), prices, colors
+
+
+@contextmanager
+def master_selection(**names):
+    yield make_selection(**names)
+
+
+SIZES = {
+    "1-city":      lambda: master_selection(cities=["Mumbai"]),
+    "1-family":    lambda: master_selection(families=["Neutrals"]),
+    "10-cities":   lambda: master_selection(),
+    "10x-cities":  lambda: synthetic_catalog(cities=SYNTHETIC_FACTOR),
+    "10x-subcats": lambda: synthetic_catalog(subcats=SYNTHETIC_FACTOR),
+}
+SYNTHETIC_SIZES = ("10x-cities", "10x-subcats")
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+# Each takes the size's context and returns a zero-argument callable to time.
+def bench_score_combination(ctx):
+    cities, subcats, prices, colors = ctx["selection"]
+    combos = [(cities[i % len(cities)], subcats[i % len(subcats)], prices[i % len(prices)],
+               colors[i % len(colors)]) for i in range(1000)]
+    return lambda: [score_combination(*c) for c in combos]
+
+def bench_score_batch(ctx):
+    return lambda: score_frame(*ctx["selection"])
+
+def bench_score_sharded(ctx):
+    return lambda: score_sharded(*ctx["selection"], k=10)
+
+def bench_stream(ctx):
+    def run():
+        summary = stream_summary(*ctx["selection"], k=10, min_velocity=0)
+        return summary.top(), summary.aggregates()
+    return run
+
+def bench_select(ctx):
+    def run():
+        score_cache().clear()
+        return compute_all_combinations(*ctx["selection"])
+    return run
+
+def bench_top_k(ctx):
+    return lambda: top_k(ctx["table"], 10, 0)
+
+def bench_aggregates(ctx):
+    return lambda: build_aggregates(ctx["table"])
+
+def bench_cards(ctx):
+    cities, subcats, prices, colors = ctx["selection"]
+    top = top_k(ctx["table"], 10, 0)
+    def run():
+        score_cache().clear()
+        city_rankings(top, cities, subcats, prices, colors)
+        return series_stats(timeseries_for_frame(top))
+    return run
+
+def bench_card_html(ctx):
+    top    = top_k(ctx["table"], 10, 0)
+    series = timeseries_for_frame(top)
+    def run():                              # what render_cards builds per card, for K=10
+        return [(RANK_LABELS[min(i, len(RANK_LABELS) - 1)], swatch_html(row["color"], row["color_hex"]),
+                 sparkline_svg(series[i], RANK_COLORS[min(i, 4)]), get_insight(row, i))
+                for i, row in top.iterrows()]
+    return run
+
+# name → (factory, runs on synthetic sizes)
+BENCHMARKS = {
+    "score_combination": (bench_score_combination, False),
+    "score_batch":       (bench_score_batch,       True),
+    "score_sharded":     (bench_score_sharded,     True),
+    "stream":            (bench_stream,            True),
+    "select":            (bench_select,            False),
+    "top_k":             (bench_top_k,             True),
+    "aggregates":        (bench_aggregates,        True),
+    "cards":             (bench_cards,             False),
+    "card_html":         (bench_card_html,         False),
+}
+
+
+def measure(fn, repeat: int) -> dict:
+    """Best and median wall time over `repeat` runs, then peak traced memory of one more."""
+    fn()                                    # warm-up: imports, lazy caches, page faults
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"time_s": min(times), "median_s": statistics.median(times), "peak_mb": peak / 2**20}
+
+
+def run_suite(sizes=SIZES, only=None, repeat: int = 5, log=print) -> dict:
+    score_cube()                            # the mapped cube is setup, not a benchmark
+    results = {}
+    for size, make in sizes.items():
+        synthetic = size in SYNTHETIC_SIZES
+        with make() as selection:
+            ctx = {"selection": selection}
+            ctx["table"] = (add_score_norm(score_frame(*selection)) if synthetic
+                            else compute_all_combinations(*selection))
+            for name, (factory, on_synthetic) in BENCHMARKS.items():
+                if (only and name not in only) or (synthetic and not on_synthetic):
+                    continue
+                r = measure(factory(ctx), max(1, repeat // 2) if synthetic else repeat)
+                r["combos"] = len(ctx["table"])
+                results[f"{size}/{name}"] = r
+                log(f"{size + '/' + name:<32} {r['combos']:>10,}  {r['time_s'] * 1e3:>10.2f} ms"
+                    f"  (median {r['median_s'] * 1e3:.2f})  peak {r['peak_mb']:>8.1f} MB")
+    score_cache().clear()
+    return results
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "processor": platform.processor() or platform.node()}
+
+
+def compare(results: dict, baseline: dict, time_tol: float, memory_tol: float) -> list:
+    """Human-readable regressions of results against a baseline's results."""
+    regressions = []
+    for key, r in results.items():
+        b = baseline.get(key)
+        if b is None:
+            continue
+        if r["time_s"] > b["time_s"] * (1 + time_tol) and r["time_s"] - b["time_s"] > TIME_FLOOR_S:
+            regressions.append(f"{key}: time {b['time_s'] * 1e3:.2f} → {r['time_s'] * 1e3:.2f} ms "
+                               f"(+{r['time_s'] / b['time_s'] - 1:.0%})")
+        if r["peak_mb"] > b["peak_mb"] * (1 + memory_tol) and r["peak_mb"] - b["peak_mb"] > MEMORY_FLOOR_MB:
+            regressions.append(f"{key}: peak {b['peak_mb']:.1f} → {r['peak_mb']:.1f} MB "
+                               f"(+{r['peak_mb'] / b['peak_mb'] - 1:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m fashion_trends.bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), metavar="BENCH",
+                        help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="skip the synthetic 10× sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BENCH_BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write this run as the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = +25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="allowed peak-memory growth")
+    args = parser.parse_args(argv)
+
+    sizes   = {k: v for k, v in SIZES.items() if not (args.quick and k in SYNTHETIC_SIZES)}
+    results = run_suite(sizes, args.only, args.repeat)
+
+    if args.save:
+        saved = {}
+        if args.baseline.exists():
+            saved = json.loads(args.baseline.read_text()).get("results", {})
+        args.baseline.write_text(json.dumps({"environment": environment(), "results": {**saved, **results}},
+                                            indent=2))
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("environment") != environment():
+        print("note: baseline was recorded in a different environment:", baseline.get("environment"),
+              file=sys.stderr)
+    regressions = compare(results, baseline["results"], args.time_tolerance, args.memory_tolerance)
+    for line in regressions:
+        print("REGRESSION", line)
+    print(f"{len(results)} benchmarks, {len(regressions)} regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""
+Bounded, thread-safe result cache shared by every session in the process.
+"""
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .data import latest_master_data, master_data
+
+# LRU-bounded by entry count and bytes; hits return the cached frame itself
+# instead of an unpickled copy (as st.cache_data would).
+
+def read_only(value):
+    """
+    Mark the arrays behind a cached DataFrame, ndarray, or dict/tuple of them
+    read-only, in place. Every session shares the cached object, so an in-place
+    write must fail loudly rather than corrupt it; derived frames (filters,
+    sorts, new columns) are unaffected. Returns value.
+    """
+    if isinstance(value, pd.DataFrame):
+        for arr in value._mgr.arrays:           # the blocks themselves, not views of them
+            read_only(getattr(arr, "_codes", getattr(arr, "_ndarray", arr)))
+    elif isinstance(value, dict):
+        for v in value.values():
+            read_only(v)
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            read_only(v)
+    elif isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    return value
+
+def cached_nbytes(value) -> int:
+    """Footprint of a cached DataFrame, ndarray, bytes, or dict/tuple of them."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(cached_nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(cached_nbytes(v) for v in value)
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return int(getattr(value, "nbytes", 0))
+
+class ScoreCache:
+    """
+    Thread-safe LRU cache for per-selection results, bounded by max_entries and
+    max_bytes, with a TTL. Stored values are made read_only(). Counters are
+    exposed through stats() for logs and the admin panel.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 2**20,
+                 ttl: float = 1800, sizeof=cached_nbytes):
+        self.max_entries, self.max_bytes, self.ttl = max_entries, max_bytes, ttl
+        self._sizeof  = sizeof
+        self._entries = OrderedDict()          # key → (value, nbytes, stored_at)
+        self._lock    = threading.Lock()
+        self.hits = self.misses = self.evictions = self.bytes = 0
+
+    def get_or_compute(self, key, compute, keep=None):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        keep, if given, is checked under the lock before storing; when it
+        returns False the value is returned but not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._evict(key)
+            self.misses += 1
+        value = compute()                      # outside the lock: other keys stay servable
+        self.put(key, value, keep)
+        return value
+
+    def put(self, key, value, keep=None) -> None:
+        read_only(value)
+        nbytes = self._sizeof(value)
+        with self._lock:
+            if keep is not None and not keep():
+                return
+            if key in self._entries:
+                self._evict(key, count=False)
+            self._entries[key] = (value, nbytes, time.monotonic())
+            self.bytes += nbytes
+            # Never evict the entry just stored, even if it alone exceeds max_bytes
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self.bytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key, count: bool = True) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self.bytes -= nbytes
+        self.evictions += count
+
+    def invalidate_members(self, names) -> int:
+        """
+        Evict every entry whose key names one of these members. Keys hold a
+        selection as tuples of member names, so entries for selections that
+        never mention a changed member survive. Returns the number evicted.
+        """
+        names = frozenset(names)
+        with self._lock:
+            stale = [key for key in self._entries
+                     if any(isinstance(part, tuple) and not names.isdisjoint(part) for part in key)]
+            for key in stale:
+                self._evict(key, count=False)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self.bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+def master_cached(key, compute):
+    """
+    score_cache().get_or_compute for a result derived from master_data(). A
+    result computed from a snapshot that has since been replaced is returned
+    but not stored, so a slow reader can't re-cache what a reload evicted.
+    """
+    master = master_data()
+    return score_cache().get_or_compute(key, compute, keep=lambda: master is latest_master_data())
+
+@functools.lru_cache(maxsize=None)
+def score_cache() -> ScoreCache:
+    """The process-wide result cache; bounds come from SCORE_CACHE_MAX_ENTRIES / _MAX_BYTES."""
+    return ScoreCache(
+        max_entries=int(os.environ.get("SCORE_CACHE_MAX_ENTRIES", 64)),
+        max_bytes=int(os.environ.get("SCORE_CACHE_MAX_BYTES", 256 * 2**20)),
+    )
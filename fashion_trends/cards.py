@@ -0,0 +1,58 @@
+"""
+Per-card building blocks for the dashboard's top-combination cards: the rank
+label and colour, the color swatch chip, the sparkline SVG and the insight text.
+
+Card graphics are inline HTML/SVG, not Plotly figures: no per-card JSON payload
+or JS mount. The builders are pure string functions, so the benchmark suite can
+time them without Streamlit.
+"""
+import numpy as np
+
+RANK_LABELS = ["#1 — HOTTEST", "#2 — RISING FAST", "#3 — STRONG SIGNAL", "#4 — EMERGING", "#5 — WATCH THIS"]
+RANK_COLORS = ["#e8a020", "#c0c0c0", "#cd7f32", "#3a8a6a", "#5a4a8a"]
+
+LIGHT_SWATCHES = {"White", "Beige / Cream", "Mint", "Silver", "Sky Blue", "Yellow", "Lavender"}
+
+INSIGHT_TEMPLATES = [
+    lambda r: f"Search volume for {r['subcat']} in {r['color'].lower()} has been accelerating for 3 consecutive weeks in {r['city']} — driven by social commerce and reel virality.",
+    lambda r: f"{r['city']}'s {r['group'].lower()} buyers are actively comparing {r['price']} options. This sweet spot covers the widest purchase-intent window.",
+    lambda r: f"{r['color']} has overtaken neutral tones in {r['city']} searches for {r['group'].lower()} — shifting from aspirational to mainstream adoption.",
+    lambda r: f"Wedding season + festival overlap is amplifying {r['subcat']} demand in {r['city']}. The {r['price']} bracket sees the highest add-to-cart signals.",
+    lambda r: f"Influencer-led content featuring {r['subcat']} in {r['color'].lower()} tones is outperforming category average CTR in {r['city']} by ~2×.",
+]
+
+
+def hex_to_rgba(hex_color: str, alpha: float = 0.1) -> str:
+    """Convert a #rrggbb hex string to an rgba() string Plotly accepts."""
+    h = hex_color.lstrip("#")
+    if len(h) == 3:
+        h = "".join(c*2 for c in h)
+    r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+    return f"rgba({r},{g},{b},{alpha})"
+
+
+def swatch_html(color_name: str, color_hex: str) -> str:
+    """A filled color chip with its name, readable on light and dark colors."""
+    text = "#333" if color_name in LIGHT_SWATCHES else "white"
+    return (f'<div style="background:{color_hex};height:36px;display:flex;align-items:center;'
+            f'justify-content:center;font-family:\'DM Mono\',monospace;font-size:10px;color:{text}">'
+            f'{color_name}</div>')
+
+
+def sparkline_svg(values, color: str, height: int = 90, y_max: float = 105) -> str:
+    """Filled line chart of a series as inline SVG, stretched to the container width."""
+    n   = len(values)
+    xs  = np.linspace(0, 100, n) if n > 1 else np.array([0.0, 100.0])
+    ys  = y_max - np.asarray(values, dtype=float)
+    ys  = ys if n > 1 else np.repeat(ys, 2)
+    pts = " ".join(f"{x:.2f},{y:.1f}" for x, y in zip(xs, ys))
+    return (f'<svg viewBox="0 0 100 {y_max:g}" preserveAspectRatio="none" width="100%" height="{height}" '
+            f'style="display:block">'
+            f'<polygon points="0,{y_max:g} {pts} 100,{y_max:g}" fill="{hex_to_rgba(color, 0.09)}"/>'
+            f'<polyline points="{pts}" fill="none" stroke="{color}" stroke-width="2" '
+            f'vector-effect="non-scaling-stroke" stroke-linejoin="round"/></svg>')
+
+
+def get_insight(row, rank):
+    """The insight line for a card; templates rotate with the card's rank."""
+    return INSIGHT_TEMPLATES[rank % len(INSIGHT_TEMPLATES)](row)
@@ -0,0 +1,179 @@
+"""
+Command-line entry point for the scoring engine.
+
+    python -m fashion_trends top --n 5 --min-velocity 0 --cities Mumbai Delhi --timeframe "Last 7 days"
+    python -m fashion_trends table --groups Sarees Lehengas --format parquet -o combos.parquet
+    python -m fashion_trends table --format arrow -o combos.arrow
+    python -m fashion_trends aggregates --families Neutrals --format json
+    python -m fashion_trends top --n 10 --stream          # bounded memory, any catalog size
+    python -m fashion_trends movers -n 20 --groups Streetwear
+    python -m fashion_trends whatif --city Bengaluru --set streetwear=1.8 --set Pink=1.7 -n 10
+    python -m fashion_trends ingest --cities Mumbai --timeframes "Last 30 days" --record trends.jsonl
+    python -m fashion_trends serve --port 8765
+"""
+import argparse
+import json
+import sys
+
+import pandas as pd
+
+from .aggregates import aggregates_frame, compute_aggregates
+from .cube import compute_all_combinations
+from .data import DEFAULT_TIMEFRAME, TIMEFRAME_OPTIONS, check_selection, make_selection, master_data
+from .engine import top_k
+from .export import write_export
+from .stream import stream_summary
+from .registry import MULTIPLIERS
+from .timeseries import series_stats, timeseries_for_frame
+from .whatif import WhatIfSession
+
+FORMATS = ("csv", "json", "parquet", "arrow")
+
+
+def write_frame(df, fmt: str, output=None) -> None:
+    """Write df as csv / json (records) / parquet / arrow IPC to output, or to stdout if None."""
+    if fmt == "json":
+        df.to_json(output if output else sys.stdout, orient="records", force_ascii=False)
+    elif output:
+        with open(output, "wb") as f:
+            write_export(df, fmt, f)
+    else:
+        write_export(df, fmt, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m fashion_trends",
+                                     description="Score India fashion trend combinations.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    sel = common.add_argument_group("selection (default: everything)")
+    sel.add_argument("--cities", nargs="+", metavar="CITY")
+    sel.add_argument("--groups", nargs="+", metavar="GROUP")
+    sel.add_argument("--prices", nargs="+", metavar="BUCKET")
+    sel.add_argument("--colors", nargs="+", metavar="COLOR")
+    sel.add_argument("--families", nargs="+", metavar="FAMILY", help="color families (ignored with --colors)")
+    sel.add_argument("--timeframe", choices=list(TIMEFRAME_OPTIONS), default=DEFAULT_TIMEFRAME, metavar="LABEL",
+                     help=f'scoring window (default: "{DEFAULT_TIMEFRAME}")')
+    out = common.add_argument_group("output")
+    out.add_argument("--format", choices=FORMATS, default="csv")
+    out.add_argument("-o", "--output", help="file path (default: stdout)")
+
+    top = sub.add_parser("top", parents=[common], help="the Top N combinations")
+    top.add_argument("-n", "--n", type=int, default=5)
+    top.add_argument("--min-velocity", type=float, default=0.0)
+    sub.add_parser("table", parents=[common], help="the full scored table")
+    agg = sub.add_parser("aggregates", parents=[common], help="header stats, pairwise means, histogram")
+    for p in (top, agg):
+        p.add_argument("--stream", action="store_true",
+                       help="score the space in bounded-memory chunks instead of one table")
+    mov = sub.add_parser("movers", parents=[common], help="combinations ranked by trend acceleration")
+    mov.add_argument("-n", "--n", type=int, default=20)
+    mov.add_argument("--min-velocity", type=float, default=0.0)
+    wif = sub.add_parser("whatif", parents=[common], help="the Top N with one city's profile changed")
+    wif.add_argument("--city", required=True)
+    wif.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", dest="changes",
+                     help=f"a multiplier ({', '.join(MULTIPLIERS)}) or a color weight, e.g. Pink=1.7")
+    wif.add_argument("-n", "--n", type=int, default=5)
+    wif.add_argument("--min-velocity", type=float, default=0.0)
+
+    ing = sub.add_parser("ingest", help="fetch Google Trends interest into the local cache")
+    ing.add_argument("--cities", nargs="+", metavar="CITY")
+    ing.add_argument("--timeframes", nargs="+", metavar="LABEL", help='e.g. "Last 30 days"')
+    ing.add_argument("--rate", type=float, default=0.2, help="requests per second (token bucket)")
+    ing.add_argument("--max-age-hours", type=float, default=24.0, help="refetch entries older than this")
+    ing.add_argument("--cache", help="SQLite cache path (default: TRENDS_CACHE_PATH)")
+    src = ing.add_mutually_exclusive_group()
+    src.add_argument("--replay", metavar="JSONL", help="serve recorded responses instead of Google")
+    src.add_argument("--record", metavar="JSONL", help="also record live responses to this file")
+
+    srv = sub.add_parser("serve", help="run the HTTP/JSON query service")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--workers", type=int, default=4, help="scoring worker threads")
+    return parser
+
+
+def _ingest(parser, args) -> int:
+    from . import ingest
+    try:
+        check_selection(cities=args.cities)
+    except ValueError as exc:
+        parser.error(str(exc))
+    unknown = [t for t in args.timeframes or () if t not in TIMEFRAME_OPTIONS]
+    if unknown:
+        parser.error(f"unknown timeframes: {', '.join(unknown)}")
+
+    if args.replay:
+        transport = ingest.ReplayTransport(args.replay)
+    else:
+        transport = ingest.PyTrendsTransport()
+        if args.record:
+            transport = ingest.RecordingTransport(transport, args.record)
+    cache = ingest.TrendsCache(args.cache) if args.cache else ingest.TrendsCache()
+    stats = ingest.ingest(transport, cache, args.cities, args.timeframes,
+                          bucket=ingest.TokenBucket(args.rate, capacity=3),
+                          max_age=args.max_age_hours * 3600)
+    print(json.dumps(stats))
+    return 1 if stats["failed_batches"] else 0
+
+
+def _whatif(parser, args, selection):
+    multipliers, colors, known_colors = {}, {}, master_data().colors
+    for change in args.changes:
+        key, sep, value = change.rpartition("=")
+        try:
+            value = float(value)
+        except ValueError:
+            sep = ""
+        if not sep or (key not in MULTIPLIERS and key not in known_colors):
+            parser.error(f"--set expects MULTIPLIER=VALUE or COLOR=VALUE, got {change!r}")
+        (multipliers if key in MULTIPLIERS else colors)[key] = value
+    session = WhatIfSession(*selection, args.timeframe, args.n, args.min_velocity)
+    try:
+        session.apply(args.city, colors, **multipliers)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return session.top()
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args   = parser.parse_args(argv)
+    if args.command == "serve":
+        from .service import serve
+        serve(args.host, args.port, args.workers)
+        return 0
+
+    if args.command == "ingest":
+        return _ingest(parser, args)
+
+    names = dict(cities=args.cities, groups=args.groups, prices=args.prices,
+                 colors=args.colors, families=args.families)
+    try:
+        check_selection(**names)
+    except ValueError as exc:
+        parser.error(str(exc))
+    selection = make_selection(**names)
+    if not all(selection):
+        parser.error("the selection is empty in at least one dimension")
+
+    if args.command == "top" and args.stream:
+        df = stream_summary(*selection, args.timeframe, args.n, args.min_velocity).top()
+    elif args.command == "top":
+        df = top_k(compute_all_combinations(*selection, args.timeframe), args.n, args.min_velocity)
+    elif args.command == "table":
+        df = compute_all_combinations(*selection, args.timeframe)
+    elif args.command == "whatif":
+        df = _whatif(parser, args, selection)
+    elif args.command == "movers":
+        df = compute_all_combinations(*selection, args.timeframe)
+        df = pd.concat([df, series_stats(timeseries_for_frame(df))], axis=1)
+        df = top_k(df, args.n, args.min_velocity, by="acceleration")
+    elif args.stream:
+        df = aggregates_frame(stream_summary(*selection, args.timeframe, k=0).aggregates())
+    else:
+        df = aggregates_frame(compute_aggregates(*selection, args.timeframe))
+    write_frame(df, args.format, args.output)
+    return 0
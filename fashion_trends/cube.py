@@ -0,0 +1,272 @@
+"""
+The precomputed score cube (city × subcat × price × color), its persistent
+memory-mapped store, and the per-selection queries served from it.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import master_cached, score_cache
+from .data import (
+    DEFAULT_TIMEFRAME, TIMEFRAME_OPTIONS, TIMEFRAME_PROFILES, MasterData, install_master_data,
+    latest_master_data, master_data, read_master_data,
+)
+from .engine import SCORE_COLS, add_score_norm, combo_grid, frame_from_arrays, score_arrays
+from .noise import NOISE_SEED
+from .parallel import PARALLEL_MIN_COMBOS, default_workers, score_sharded
+from .registry import DIMS, diff_records, master_registry, member_records
+
+log = logging.getLogger("fashion_trends.data")
+
+
+# ── Base-score cube ──────────────────────────────────────────────────────────
+# A combination's raw signals never depend on what else is selected (noise is
+# keyed by member names), so the full space is scored once per process into
+# city × subcat × price × color arrays. A sidebar selection is then a slice.
+# There is one such snapshot per TIMEFRAME_OPTIONS window, so switching the
+# period is a lookup rather than a rescore.
+TIMEFRAMES = list(TIMEFRAME_OPTIONS)
+
+def cube_dims(master: MasterData = None) -> tuple:
+    """The master-data cube's (cities, subcats, prices, colors) for a snapshot (default: master_data())."""
+    m = master or master_data()
+    return list(m.cities), list(m.subcats), list(m.prices), list(m.colors)
+
+def _cube_dict(dims, stacked: np.ndarray) -> dict:
+    """Wrap a (len(SCORE_COLS), *shape) array as a cube; each signal is a view."""
+    return {
+        "dims":  dims,
+        "index": [{name: i for i, name in enumerate(d)} for d in dims],
+        **{col: stacked[i] for i, col in enumerate(SCORE_COLS)},
+    }
+
+def build_score_cube(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                     registry=None) -> dict:
+    """Score the full cross-product into one 4-D int8 array per SCORE_COLS signal."""
+    return _cube_dict((list(cities), list(subcats), list(prices), list(colors)),
+                      _build_stack(cities, subcats, prices, colors, timeframe, registry))
+
+def _build_stack(cities, subcats, prices, colors, timeframe: str, registry=None) -> np.ndarray:
+    shape = (len(cities), len(subcats), len(prices), len(colors))
+    if math.prod(shape) >= PARALLEL_MIN_COMBOS and default_workers() > 1:
+        # Scaled-up catalogs: score shards across a process pool
+        signals = score_sharded(cities, subcats, prices, colors, timeframe, k=0, registry=registry)["signals"]
+        return signals.reshape((len(SCORE_COLS),) + shape)
+    a     = score_arrays(cities, subcats, prices, colors, timeframe, registry=registry)
+    return np.stack([a[col].reshape(shape) for col in SCORE_COLS]).astype(np.int8)
+
+def build_score_store(cities, subcats, prices, colors, timeframes=TIMEFRAMES, registry=None) -> np.ndarray:
+    """Every window's cube in one (len(timeframes), len(SCORE_COLS), *shape) int8 array."""
+    return np.stack([_build_stack(cities, subcats, prices, colors, tf, registry) for tf in timeframes])
+
+
+# ── Persistent score store ───────────────────────────────────────────────────
+# All window snapshots are written once as <version>.npy (+ <version>.json for
+# the dims and timeframes) and memory-mapped by every later process, so a cold
+# start is a file open and all workers on a host share the same page-cache copy.
+# The version hashes all the master data and model constants the scores depend on.
+SCORE_MODEL_VERSION = 2
+SCORE_STORE_DIR     = Path(os.environ.get("SCORE_STORE_DIR", Path(__file__).resolve().parent.parent / ".score_store"))
+
+def master_data_version(master: MasterData = None) -> str:
+    """
+    Short content hash of everything in a snapshot (default: master_data()) that
+    feeds the scoring model; computed once per snapshot.
+    """
+    m = master or master_data()
+    def build():
+        g, p = m.group_sets, m.price_sets
+        payload = json.dumps(
+            [SCORE_MODEL_VERSION, NOISE_SEED, m.cities, m.categories, m.prices, m.colors,
+             m.profiles, g["western"], g["ethnic"], g["luxury"], g["budget"],
+             g["street"], p["luxury"], p["budget"], TIMEFRAMES, TIMEFRAME_PROFILES],
+            sort_keys=True, ensure_ascii=False,
+            default=lambda o: sorted(o) if isinstance(o, frozenset) else dict(o),    # frozensets, read-only tables
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+    return m.derive("version", build)
+
+def save_store(store: np.ndarray, dims, timeframes, store_dir: Path, version: str) -> None:
+    """Atomically write the store; concurrent writers race harmlessly on os.replace."""
+    store_dir.mkdir(parents=True, exist_ok=True)
+    tmp = f".{os.getpid()}.tmp"
+    with open(store_dir / f"{version}.npy{tmp}", "wb") as f:
+        np.save(f, store)
+    (store_dir / f"{version}.json{tmp}").write_text(json.dumps(
+        {"version": version, "signals": SCORE_COLS, "timeframes": list(timeframes), "dims": dims},
+        ensure_ascii=False))
+    os.replace(store_dir / f"{version}.json{tmp}", store_dir / f"{version}.json")
+    os.replace(store_dir / f"{version}.npy{tmp}", store_dir / f"{version}.npy")
+
+def load_store(store_dir: Path, version: str):
+    """Memory-map a stored (meta, array) pair, or None if this version has not been written."""
+    try:
+        meta  = json.loads((store_dir / f"{version}.json").read_text())
+        store = np.load(store_dir / f"{version}.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if meta.get("signals") != SCORE_COLS or meta.get("timeframes") != TIMEFRAMES:
+        return None
+    return meta, store
+
+# The store is part of its MasterData snapshot (derive()d on it), so a cube is
+# never read against another version's tables.
+def _score_store(master: MasterData = None):
+    """(dims, array) for a snapshot (default: master_data()) — memory-mapped, built and saved on a miss."""
+    master = master or master_data()
+    return master.derive("store", lambda: _open_store(master))
+
+def _open_store(master: MasterData):
+    version = master_data_version(master)
+    loaded  = load_store(SCORE_STORE_DIR, version)
+    if loaded is not None:
+        meta, store = loaded
+        return tuple(meta["dims"]), store
+    dims = cube_dims(master)
+    return _saved(dims, build_score_store(*dims, registry=master_registry(master)), version)
+
+def _saved(dims, store: np.ndarray, version: str):
+    store.flags.writeable = False       # shared by every reader of the snapshot
+    try:
+        save_store(store, dims, TIMEFRAMES, SCORE_STORE_DIR, version)
+    except OSError:
+        pass    # read-only deploy: keep serving from memory
+    return dims, store
+
+def score_cube(timeframe: str = DEFAULT_TIMEFRAME, master: MasterData = None) -> dict:
+    """A snapshot's (default: master_data()) cube for one TIMEFRAME_OPTIONS window (views into its store)."""
+    master = master or master_data()
+    def build():
+        dims, store = _score_store(master)
+        return _cube_dict(dims, store[TIMEFRAMES.index(timeframe)])
+    return master.derive(("cube", timeframe), build)
+
+def slice_cube(cube: dict, cities, subcats, prices, colors) -> dict:
+    """Flat score arrays for a selection, in the same product order as score_arrays."""
+    sel   = [np.array([cube["index"][d][name] for name in names], dtype=np.intp)
+             for d, names in enumerate((cities, subcats, prices, colors))]
+    block = np.ix_(*sel)
+    ci, si, pi, ki = combo_grid(cities, subcats, prices, colors)
+    return {
+        "city_idx": ci, "subcat_idx": si, "price_idx": pi, "color_idx": ki,
+        **{col: cube[col][block].ravel() for col in SCORE_COLS},
+    }
+
+# ── Per-selection score tables ───────────────────────────────────────────────
+def _score_selection(cities, subcats, prices, colors, timeframe) -> pd.DataFrame:
+    a  = slice_cube(score_cube(timeframe, master_data()), cities, subcats, prices, colors)
+    # Normalize composite to 0-100 across the selected search space
+    return add_score_norm(frame_from_arrays(a, cities, subcats, prices, colors))
+
+def compute_all_combinations(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME):
+    """Score every combination and return the DataFrame in product order (rank with top_k)."""
+    # Keyed by the snapshot's version too, so a reader pinned to an older snapshot never gets a newer one's table
+    key = ("combos", master_data_version(), timeframe, cities, subcats, prices, colors)
+    return master_cached(key, lambda: _score_selection(cities, subcats, prices, colors, timeframe))
+
+
+# ── Cross-city ranking ───────────────────────────────────────────────────────
+def _city_sorted_composites(subcats, prices, colors, timeframe, master: MasterData) -> np.ndarray:
+    """Per master city, the composites of every selected subcat × price × color, ascending."""
+    cube = score_cube(timeframe, master)
+    def build():
+        sel  = [np.array([cube["index"][d][n] for n in names], dtype=np.intp)
+                for d, names in ((1, subcats), (2, prices), (3, colors))]
+        block = cube["composite"][:, sel[0][:, None, None], sel[1][None, :, None], sel[2][None, None, :]]
+        return np.sort(block.reshape(block.shape[0], -1), axis=1)
+    # Keyed by the cube's cities too, so a change to any city evicts it
+    key = ("city_sorted", master_data_version(master), timeframe, tuple(cube["dims"][0]), subcats, prices, colors)
+    return master_cached(key, build)
+
+def city_rankings(top: pd.DataFrame, cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME):
+    """
+    For every row of top, its raw composite and its rank within each city — one
+    fancy-index into the cube, not a rescoring per card × city.
+
+    Returns (composite, rank), both shaped (len(top), len(cities)); rank 1 is the
+    best combo of that city among the selected subcats × prices × colors.
+    """
+    master = master_data()
+    cube = score_cube(timeframe, master)
+    idx  = cube["index"]
+    ci   = np.array([idx[0][c] for c in cities], dtype=np.intp)
+    si   = np.array([idx[1][s] for s in top["subcat"]], dtype=np.intp)
+    pi   = np.array([idx[2][p] for p in top["price"]], dtype=np.intp)
+    ki   = np.array([idx[3][k] for k in top["color"]], dtype=np.intp)
+    composite = cube["composite"][ci[None, :], si[:, None], pi[:, None], ki[:, None]]
+
+    asc  = _city_sorted_composites(subcats, prices, colors, timeframe, master)[ci]     # (n_cities, N)
+    rank = np.empty(composite.shape, dtype=np.int64)
+    for j in range(len(ci)):
+        rank[:, j] = asc.shape[1] - np.searchsorted(asc[j], composite[:, j], side="right") + 1
+    return composite, rank
+
+
+# ── Master-data hot reload ───────────────────────────────────────────────────
+# refresh_master_data() is one stat() when the file is unchanged, so the
+# dashboard and the service call it on every run / request. A change is built
+# into a complete new snapshot first: tables, registry, and a store in which
+# only the slabs of changed members are rescored. Only then is it installed, in
+# one reference swap, and only cached results whose selection names a changed
+# member are evicted; readers on the old snapshot finish undisturbed.
+_refresh_lock = threading.Lock()
+
+def _patch_store(dims, store: np.ndarray, changed: dict, version: str, master: MasterData):
+    """master's store, reusing every cell of the old one whose members are unchanged."""
+    new_dims  = cube_dims(master)
+    registry  = master_registry(master)
+    old_index = [{name: i for i, name in enumerate(d)} for d in dims]
+    # Gather surviving members into their new positions (new members take a placeholder, rescored below)
+    src     = [np.array([old_index[d].get(n, 0) for n in names], dtype=np.intp) for d, names in enumerate(new_dims)]
+    patched = np.ascontiguousarray(store[(slice(None), slice(None), *np.ix_(*src))])
+    for d, names in enumerate(new_dims):
+        stale = [i for i, n in enumerate(names) if n in changed.get(DIMS[d], ()) or n not in old_index[d]]
+        if not stale:
+            continue
+        sel    = list(new_dims)
+        sel[d] = [names[i] for i in stale]
+        block  = [slice(None)] * 4
+        block[d] = np.array(stale, dtype=np.intp)
+        for t, timeframe in enumerate(TIMEFRAMES):
+            patched[t][(slice(None), *block)] = _build_stack(*sel, timeframe, registry)
+    return _saved(new_dims, patched, version)
+
+def refresh_master_data(force: bool = False) -> dict:
+    """
+    Reload the master-data file if it changed and bring the score store and
+    result cache up to date. Returns {dim: changed member names}; empty when
+    nothing changed or the new file was rejected (the current data stays live).
+    """
+    with _refresh_lock:
+        old = latest_master_data()
+        try:
+            new = read_master_data(force=force)
+        except (OSError, ValueError) as exc:
+            log.warning("master data not reloaded: %s", exc)
+            return {}
+        if new is None:
+            return {}
+        changed = diff_records(member_records(old), member_records(new))
+        built   = old.derived("store")
+        if built is not None:
+            # Ready the new store before the swap, so the first reader after it doesn't rebuild
+            version = master_data_version(new)
+            if version == master_data_version(old):
+                store = built
+            else:
+                loaded = load_store(SCORE_STORE_DIR, version)
+                store  = ((tuple(loaded[0]["dims"]), loaded[1]) if loaded is not None
+                          else _patch_store(*built, changed, version, new))
+            new.derive("store", lambda: store)
+        install_master_data(new)
+        evicted = score_cache().invalidate_members(frozenset().union(*changed.values()))
+        log.info(json.dumps({"event": "master_data_reload", "evicted": evicted,
+                             **{dim: sorted(names) for dim, names in changed.items()}}, ensure_ascii=False))
+        return changed
@@ -0,0 +1,273 @@
+"""
+Master data for the India fashion trend model: cities, sub-categories,
+price buckets, colors and the city-level bias profiles the scores are built on.
+
+The taxonomy lives in a versioned JSON file (master_data.json next to this
+module, or $MASTER_DATA_PATH) so it can change without a redeploy. Each load
+becomes an immutable MasterData snapshot; a reload installs a new one instead
+of editing tables that other threads may be reading. Read the tables through
+master_data() — a request or script run can pin one snapshot with
+pinned_master_data() so everything it computes sees the same version. The
+module-level names (TOP10_CITIES, ALL_COLORS, ...) still resolve, to
+master_data() at access time. The timeframe windows are model constants and
+stay in code.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from types import MappingProxyType
+
+TIMEFRAME_OPTIONS = {
+    "Last 7 days":   "now 7-d",
+    "Last 30 days":  "today 1-m",
+    "Last 3 months": "today 3-m",
+    "Last 12 months":"today 12-m",
+}
+DEFAULT_TIMEFRAME = "Last 30 days"
+
+# How each window shapes the time-dependent part of a score: shorter windows carry
+# more composite noise and a wider, lower-centred velocity (MoM-style % change).
+# "Last 30 days" is the original single-window model.
+TIMEFRAME_PROFILES = {
+    "Last 7 days":    {"comp_sd": 5.0, "vel_loc": 4.0,  "vel_sd": 30.0},
+    "Last 30 days":   {"comp_sd": 3.0, "vel_loc": 8.0,  "vel_sd": 22.0},
+    "Last 3 months":  {"comp_sd": 2.0, "vel_loc": 11.0, "vel_sd": 17.0},
+    "Last 12 months": {"comp_sd": 1.5, "vel_loc": 14.0, "vel_sd": 12.0},
+}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  MASTER DATA
+# ══════════════════════════════════════════════════════════════════════════════
+MASTER_DATA_PATH     = Path(os.environ.get("MASTER_DATA_PATH", Path(__file__).resolve().parent / "master_data.json"))
+MASTER_DATA_SCHEMA   = 1
+MASTER_DATA_SECTIONS = ("cities", "city_geo", "city_profiles", "categories", "group_sets",
+                        "price_buckets", "price_sets", "colors")
+GROUP_SET_NAMES      = ("western", "ethnic", "luxury", "budget", "street")
+PRICE_SET_NAMES      = ("luxury", "budget")
+
+
+def _frozen(value):
+    """A read-only copy of a JSON-style table: mappings at every level, lists as tuples."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({k: _frozen(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_frozen(v) for v in value)
+    return value
+
+
+class MasterData:
+    """
+    One immutable snapshot of the master data. Tables are read-only mappings
+    down to their innermost records and the group / price sets frozensets; a reload builds a new snapshot and
+    swaps the module's reference to it in one assignment, so a reader holding a
+    snapshot never sees a table change under it.
+
+    derive() memoizes what is computed from a snapshot (its registry, score
+    store and per-window cubes) on the snapshot itself, so none of those can be
+    paired with another version's tables.
+    """
+
+    TABLES = ("cities", "geo", "profiles", "categories", "prices", "colors", "group_sets", "price_sets")
+
+    def __init__(self, cities, geo, profiles, categories, prices, colors, group_sets, price_sets, info=None):
+        ro = MappingProxyType
+        self.cities     = _frozen(cities)          # city → rank, market_bn, region, tier
+        self.geo        = _frozen(geo)             # city → Google Trends geo (state level)
+        self.profiles   = _frozen(profiles)        # city → category / price multipliers + color multipliers
+        self.categories = _frozen(categories)      # group → sub-category → search keywords
+        self.prices     = _frozen(prices)
+        self.colors     = _frozen(colors)
+        self.group_sets = ro({name: frozenset(group_sets.get(name, ())) for name in GROUP_SET_NAMES})
+        self.price_sets = ro({name: frozenset(price_sets.get(name, ())) for name in PRICE_SET_NAMES})
+        self.subcat_to_group = ro({sub: grp for grp, subs in categories.items() for sub in subs})
+        self.subcat_keywords = ro({sub: kw for subs in categories.values() for sub, kw in subs.items()})
+        self.subcats    = tuple(self.subcat_to_group)
+        self.info       = ro(dict(info or {}))     # path / digest / revision of the source file
+        self._derived   = {}
+        self._lock      = threading.RLock()
+
+    def replace(self, **tables) -> "MasterData":
+        """A new snapshot with some TABLES swapped; this one is untouched."""
+        return MasterData(**{**{t: getattr(self, t) for t in self.TABLES}, "info": self.info, **tables})
+
+    def derive(self, key, build):
+        """build() once per snapshot and key; every later call returns the same value."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = build()
+            return self._derived[key]
+
+    def derived(self, key, default=None):
+        """A derive()d value if it has been built, else default."""
+        return self._derived.get(key, default)
+
+
+# Module-level names of the pre-snapshot API → the snapshot attribute each reads
+_TABLE_NAMES = {
+    "TOP10_CITIES": "cities", "CITY_GEO": "geo", "CITY_PROFILES": "profiles", "CATEGORIES": "categories",
+    "SUBCAT_TO_GROUP": "subcat_to_group", "SUBCAT_KEYWORDS": "subcat_keywords", "ALL_SUBCATS": "subcats",
+    "PRICE_BUCKETS": "prices", "ALL_COLORS": "colors",
+}
+MASTER_TABLE_NAMES = (tuple(_TABLE_NAMES) + tuple(f"{n.upper()}_GROUPS" for n in GROUP_SET_NAMES)
+                      + tuple(f"{n.upper()}_PRICES" for n in PRICE_SET_NAMES))
+
+_latest      = None                 # the installed MasterData; replaced, never mutated
+_pinned      = contextvars.ContextVar("pinned_master_data", default=None)
+_loaded      = {}                   # stamp of the file last read (a bad file is reported once)
+_reload_lock = threading.Lock()
+
+
+def __getattr__(name):
+    """TOP10_CITIES, ALL_COLORS, ... read master_data() at access time."""
+    if name not in MASTER_TABLE_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    master = master_data()
+    if name in _TABLE_NAMES:
+        return getattr(master, _TABLE_NAMES[name])
+    pool, kind = name.rsplit("_", 1)
+    return (master.group_sets if kind == "GROUPS" else master.price_sets)[pool.lower()]
+
+
+def master_data() -> MasterData:
+    """The snapshot pinned in this context (pinned_master_data), else the latest installed."""
+    return _pinned.get() or _latest
+
+
+def latest_master_data() -> MasterData:
+    """The most recently installed snapshot, ignoring any pin."""
+    return _latest
+
+
+@contextmanager
+def pinned_master_data(master: MasterData = None):
+    """Serve master_data() from one snapshot (default: the latest) for the duration of a block."""
+    token = _pinned.set(master or _latest)
+    try:
+        yield _pinned.get()
+    finally:
+        _pinned.reset(token)
+
+
+def pin_master_data(master: MasterData = None) -> MasterData:
+    """pinned_master_data() for the rest of this context, e.g. one Streamlit script run."""
+    _pinned.set(master or _latest)
+    return _pinned.get()
+
+
+def _parse(raw: dict) -> dict:
+    """Validate a master-data document and return MasterData's keyword arguments."""
+    if raw.get("schema") != MASTER_DATA_SCHEMA:
+        raise ValueError(f"master data schema {raw.get('schema')!r}, expected {MASTER_DATA_SCHEMA}")
+    missing = [k for k in MASTER_DATA_SECTIONS if k not in raw]
+    if missing:
+        raise ValueError(f"master data is missing: {', '.join(missing)}")
+    cities, categories, prices, colors = raw["cities"], raw["categories"], raw["price_buckets"], raw["colors"]
+    checks = {
+        "city_profiles cities": (raw["city_profiles"], cities),
+        "city_geo cities":      (raw["city_geo"], cities),
+        "profile colors":       ({k for p in raw["city_profiles"].values() for k in p.get("colors", {})}, colors),
+        **{f"{name} groups": (members, categories) for name, members in raw["group_sets"].items()},
+        **{f"{name} prices": (members, prices) for name, members in raw["price_sets"].items()},
+    }
+    for label, (names, known) in checks.items():
+        unknown = [n for n in names if n not in known]
+        if unknown:
+            raise ValueError(f"unknown {label}: {', '.join(unknown)}")
+    missing = [c for c in cities if c not in raw["city_geo"]]
+    if missing:
+        raise ValueError(f"no city_geo for: {', '.join(missing)}")
+    return {
+        "cities":      cities,
+        "geo":         raw["city_geo"],
+        "profiles":    raw["city_profiles"],
+        "categories":  categories,
+        "prices":      {p: {**b, "range": tuple(b["range"])} for p, b in prices.items()},
+        "colors":      colors,
+        "group_sets":  raw["group_sets"],
+        "price_sets":  raw["price_sets"],
+    }
+
+
+def read_master_data(path=None, force: bool = False):
+    """
+    A new MasterData from the file if it changed since the installed snapshot
+    (mtime/size, then content digest), else None. Nothing is installed; a file
+    that fails validation raises ValueError.
+    """
+    path = Path(path or MASTER_DATA_PATH)
+    with _reload_lock:
+        stat  = path.stat()
+        stamp = (str(path), stat.st_mtime_ns, stat.st_size)
+        if not force and _latest is not None and _loaded.get("stamp") == stamp:
+            return None
+        raw    = path.read_bytes()
+        digest = hashlib.blake2b(raw, digest_size=8).hexdigest()
+        _loaded["stamp"] = stamp          # a bad file is reported once, not on every poll
+        if not force and _latest is not None and _latest.info.get("digest") == digest:
+            return None
+        doc = json.loads(raw)
+        return MasterData(**_parse(doc), info={"path": str(path), "digest": digest,
+                                               "revision": doc.get("revision")})
+
+
+def install_master_data(master: MasterData) -> None:
+    """Make master the latest snapshot: one reference swap, visible to every unpinned reader."""
+    global _latest
+    _latest = master
+
+
+def load_master_data(path=None, force: bool = False) -> bool:
+    """
+    Read and install the master-data file if it changed. True if a new
+    snapshot was installed; a file that fails validation raises ValueError and
+    leaves the current snapshot live.
+    """
+    master = read_master_data(path, force)
+    if master is not None:
+        install_master_data(master)
+    return master is not None
+
+
+def master_data_info() -> dict:
+    """Path, content digest and revision of the master-data file in use."""
+    return {k: master_data().info.get(k) for k in ("path", "digest", "revision")}
+
+
+load_master_data()
+
+def make_selection(cities=None, groups=None, prices=None, colors=None, families=None):
+    """
+    Canonical (cities, subcats, prices, colors) tuples for the scoring engine —
+    each sorted, so equal selections share cache entries. None means "all";
+    groups expand to their sub-categories, families to their colors.
+    """
+    master = master_data()
+    cities = list(master.cities) if cities is None else cities
+    groups = list(master.categories) if groups is None else groups
+    prices = list(master.prices) if prices is None else prices
+    if colors is None:
+        colors = [c for c, d in master.colors.items() if families is None or d["family"] in families]
+    subcats = [s for g in groups for s in master.categories.get(g, {})]
+    return tuple(sorted(cities)), tuple(sorted(subcats)), tuple(sorted(prices)), tuple(sorted(colors))
+
+def check_selection(cities=None, groups=None, prices=None, colors=None, families=None) -> None:
+    """Raise ValueError naming any member that is not in the master data."""
+    master = master_data()
+    known  = {
+        "cities": master.cities, "groups": master.categories, "prices": master.prices, "colors": master.colors,
+        "families": {d["family"] for d in master.colors.values()},
+    }
+    given = {"cities": cities, "groups": groups, "prices": prices, "colors": colors, "families": families}
+    for label, names in given.items():
+        unknown = [n for n in names or () if n not in known[label]]
+        if unknown:
+            raise ValueError(f"unknown {label}: {', '.join(unknown)}")
@@ -0,0 +1,255 @@
+"""
+Scoring engine: the scalar reference model (score_combination), the batched
+NumPy engine that evaluates a whole cross-product at once, and Top-K selection.
+"""
+import numpy as np
+import pandas as pd
+
+from .data import DEFAULT_TIMEFRAME, TIMEFRAME_PROFILES, master_data
+from .noise import combo_keys, member_keys, mix64, stable_key, uniforms
+from .registry import master_registry
+
+
+def score_combination(city: str, subcat: str, price: str, color: str,
+                      timeframe: str = DEFAULT_TIMEFRAME) -> dict:
+    """
+    Score a 4-way combination on four independent signals,
+    then compute a weighted composite + a momentum (velocity) score
+    for the given TIMEFRAME_OPTIONS window.
+    """
+    master = master_data()
+    reg = master_registry(master)
+    c   = reg.index["cities"][city]
+    g   = reg.subcat_group[reg.codes("subcats", (subcat,))[0]]
+    p   = reg.codes("prices", (price,))[0]
+    k   = reg.codes("colors", (color,))[0]
+    d   = draw_noise((city,), (subcat,), (price,), (color,), timeframe)[0]
+
+    # ── Base city-category affinity (western, ethnic, street; factor 1.0 where one doesn't apply) ──
+    base = int(d[0])
+    for factor in reg.cat_mult[:, c, g]:
+        base = int(base * factor)
+    cat_score = int(np.clip(base + d[1], 5, 100))
+
+    # ── Price affinity (luxury, budget) ──
+    price_base = int(d[2])
+    for factor in reg.price_mult[:, c, g, p]:
+        price_base = int(price_base * factor)
+    price_score = int(np.clip(price_base + d[3], 5, 100))
+
+    # ── Color affinity ──
+    color_base  = int(d[4])
+    color_score = int(np.clip(color_base * reg.color_mult[c, k] + d[5], 5, 100))
+
+    # ── Geo market weight (larger city = more absolute reach, Mumbai = 1.0) ──
+    geo_score = int(np.clip(70 * reg.market_weight[c] + d[6], 10, 100))
+
+    # ── Weighted composite (geo:20, cat:35, price:25, color:20) ──
+    composite = (0.20 * geo_score + 0.35 * cat_score + 0.25 * price_score + 0.20 * color_score)
+    composite = int(np.clip(composite + d[7], 5, 100))
+
+    # ── Momentum / velocity (how fast it is growing over the window) ──
+    # Simulated as a % change; positive = accelerating
+    velocity = int(np.clip(d[8], -35, 65))   # −35% to +65%, drawn per TIMEFRAME_PROFILES
+
+    # Resolve hex string once here — stored as a proper #rrggbb column in the DataFrame
+    color_hex: str = master.colors.get(color, {}).get("hex", "#888888")
+
+    return {
+        "city": city, "subcat": subcat, "group": master.subcat_to_group.get(subcat, ""),
+        "price": price, "color": color,
+        "color_hex":   color_hex,          # ← hex string, always available downstream
+        "geo_score":   geo_score,
+        "cat_score":   cat_score,
+        "price_score": price_score,
+        "color_score": color_score,
+        "composite":   composite,
+        "velocity":    velocity,
+    }
+
+# ── Batched engine ───────────────────────────────────────────────────────────
+# Same model as score_combination, evaluated for a whole cross-product at once.
+# Each dimension is encoded as an integer index into the selection, per-member
+# attributes become small lookup arrays, and every signal is one array expression.
+NOISE_COLS = ["cat_base", "cat_noise", "price_base", "price_noise",
+              "color_base", "color_noise", "geo_noise", "comp_noise", "velocity_raw"]
+
+def combo_grid(cities, subcats, prices, colors):
+    """Integer index arrays (city, subcat, price, color) in itertools.product order."""
+    grids = np.meshgrid(np.arange(len(cities)), np.arange(len(subcats)),
+                        np.arange(len(prices)), np.arange(len(colors)), indexing="ij")
+    return tuple(g.ravel() for g in grids)
+
+def draw_noise(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME) -> np.ndarray:
+    """
+    Random draws for every combination, one row per combo in product order and
+    one column per NOISE_COLS entry. Integers are uniform on [lo, hi), normals use
+    Box–Muller; all of it comes from bulk uniforms() calls.
+
+    The structural draws (columns 0–6) are shared by every window; comp_noise and
+    velocity_raw come from the timeframe's own stream, scaled by TIMEFRAME_PROFILES.
+    """
+    ci, si, pi, ki = combo_grid(cities, subcats, prices, colors)
+    keys = combo_keys(member_keys(cities)[ci], member_keys(subcats)[si],
+                      member_keys(prices)[pi], member_keys(colors)[ki])
+    u = uniforms(keys, 11)
+
+    # 3 integer draws from u[:, 0:3], up to 6 normals from the Box–Muller pairs in u[:, 3:9]...
+    radius = np.sqrt(-2.0 * np.log1p(-u[:, 3:8:2]))     # 1 - u ∈ (0, 1], log is finite
+    theta  = 2.0 * np.pi * u[:, 4:9:2]
+    z = np.concatenate([radius * np.cos(theta), radius * np.sin(theta)], axis=1)
+    # ...and the velocity normal from its own pair, so it never shares a draw with the scores
+    z_comp = z[:, 4]
+    z_vel  = np.sqrt(-2.0 * np.log1p(-u[:, 9])) * np.cos(2.0 * np.pi * u[:, 10])
+    if timeframe != DEFAULT_TIMEFRAME:
+        # Other windows draw both from a timeframe-keyed pair (the default keeps the original streams)
+        uw     = uniforms(mix64(keys ^ np.uint64(stable_key(timeframe))), 2)
+        radius = np.sqrt(-2.0 * np.log1p(-uw[:, 0]))
+        z_comp = radius * np.cos(2.0 * np.pi * uw[:, 1])
+        z_vel  = radius * np.sin(2.0 * np.pi * uw[:, 1])
+    window = TIMEFRAME_PROFILES[timeframe]
+
+    draws = np.empty((len(keys), len(NOISE_COLS)))
+    draws[:, 0] = 30 + np.floor(u[:, 0] * 42)    # integers(30, 72)
+    draws[:, 2] = 25 + np.floor(u[:, 1] * 45)    # integers(25, 70)
+    draws[:, 4] = 20 + np.floor(u[:, 2] * 52)    # integers(20, 72)
+    draws[:, 1] = 6 * z[:, 0]                    # normal(0, 6)
+    draws[:, 3] = 6 * z[:, 1]
+    draws[:, 5] = 6 * z[:, 2]
+    draws[:, 6] = 8 * z[:, 3]                    # normal(0, 8)
+    draws[:, 7] = window["comp_sd"] * z_comp                     # normal(0, comp_sd)
+    draws[:, 8] = window["vel_loc"] + window["vel_sd"] * z_vel   # normal(vel_loc, vel_sd)
+    return draws
+
+def score_arrays(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                 registry=None) -> dict:
+    """
+    Vectorized score_combination over the full cross-product of the selection.
+    Returns the integer index arrays plus one array per signal. registry
+    overrides the master-data registry (e.g. a what-if profile).
+    """
+    ci, si, pi, ki = combo_grid(cities, subcats, prices, colors)
+    noise = draw_noise(cities, subcats, prices, colors, timeframe)
+
+    # ── Factor tables for the selection, gathered from the master-data registry ──
+    # Rows are in product order, so each signal is a (city, subcat, price, color)
+    # view and the per-member factors broadcast onto it with no per-row gather.
+    reg   = registry or master_registry()
+    cc    = reg.codes("cities", cities, strict=True)
+    gc    = reg.subcat_group[reg.codes("subcats", subcats)]
+    pc    = reg.codes("prices", prices)
+    shape = (len(cities), len(subcats), len(prices), len(colors))
+    draw  = lambda j: noise[:, j].reshape(shape)
+    cat_mult   = reg.cat_mult[:, cc[:, None], gc[None, :], None, None]           # (3, cities, subcats, 1, 1)
+    price_mult = reg.price_mult[:, cc[:, None, None], gc[None, :, None], pc[None, None, :], None]
+    color_mult = reg.color_mult[np.ix_(cc, reg.codes("colors", colors))][:, None, None, :]
+    market_weight = reg.market_weight[cc][:, None, None, None]
+    signal = lambda x, lo: np.clip(x, lo, 100).astype(np.int64).ravel()
+
+    # ── Base city-category affinity: western, ethnic, street (truncate after each, like int()) ──
+    base = draw(0)
+    for factor in cat_mult:
+        base = np.trunc(base * factor)
+    cat_score = signal(base + draw(1), 5)
+
+    # ── Price affinity: luxury, budget ──
+    price_base = draw(2)
+    for factor in price_mult:
+        price_base = np.trunc(price_base * factor)
+    price_score = signal(price_base + draw(3), 5)
+
+    # ── Color affinity ──
+    color_score = signal(draw(4) * color_mult + draw(5), 5)
+
+    # ── Geo market weight ──
+    geo_score = signal(70 * market_weight + draw(6), 10)
+
+    # ── Weighted composite + velocity ──
+    composite = (0.20 * geo_score + 0.35 * cat_score + 0.25 * price_score + 0.20 * color_score)
+    composite = np.clip(composite + noise[:, 7], 5, 100).astype(np.int64)
+    velocity  = np.clip(noise[:, 8], -35, 65).astype(np.int64)
+
+    return {
+        "city_idx": ci, "subcat_idx": si, "price_idx": pi, "color_idx": ki,
+        "geo_score": geo_score, "cat_score": cat_score,
+        "price_score": price_score, "color_score": color_score,
+        "composite": composite, "velocity": velocity,
+    }
+
+SCORE_COLS = ["geo_score", "cat_score", "price_score", "color_score", "composite", "velocity"]
+
+def frame_from_arrays(a: dict, cities, subcats, prices, colors) -> pd.DataFrame:
+    """
+    Assemble the combinations DataFrame from index arrays. Every label column is
+    a Categorical (small-int codes into the selection lists) and every signal is
+    int8, so a cached table is a few bytes per row instead of six Python strings.
+    group and color_hex are resolved through per-member lookup arrays on the codes.
+    """
+    ci, si, pi, ki = a["city_idx"], a["subcat_idx"], a["price_idx"], a["color_idx"]
+    master      = master_data()
+    group_of    = lambda s: master.subcat_to_group.get(s, "")
+    hex_of      = lambda k: master.colors.get(k, {}).get("hex", "#888888")
+    groups      = sorted(set(group_of(s) for s in subcats))
+    subcat_grp  = np.array([groups.index(group_of(s)) for s in subcats])
+    hexes       = list(dict.fromkeys(hex_of(k) for k in colors))
+    color_hex   = np.array([hexes.index(hex_of(k)) for k in colors])
+    cat = pd.Categorical.from_codes
+    return pd.DataFrame({
+        "city":      cat(ci, categories=list(cities)),
+        "subcat":    cat(si, categories=list(subcats)),
+        "group":     cat(subcat_grp[si], categories=groups),
+        "price":     cat(pi, categories=list(prices)),
+        "color":     cat(ki, categories=list(colors)),
+        "color_hex": cat(color_hex[ki], categories=hexes),
+        **{col: a[col].astype(np.int8, copy=False) for col in SCORE_COLS},
+    })
+
+def add_score_norm(df: pd.DataFrame, composite_range=None) -> pd.DataFrame:
+    """
+    Set df's score_norm column in place and return df: composite scaled to 0–100
+    over composite_range = (min, max), by default df's own composite range.
+    """
+    mn, mx = composite_range or (df["composite"].min(), df["composite"].max())
+    df["score_norm"] = ((df["composite"] - mn) / (mx - mn) * 100).round(1).astype(np.float32)
+    return df
+
+def normalized_frame(signals: np.ndarray, positions, composite_range, cities, subcats, prices, colors):
+    """
+    Score-table rows at product-order positions of a (len(SCORE_COLS), N) signal
+    array, with score_norm scaled to composite_range = (min, max) of the space.
+    """
+    shape = (len(cities), len(subcats), len(prices), len(colors))
+    ci, si, pi, ki = np.unravel_index(positions, shape)
+    sig = signals[:, positions]
+    df  = frame_from_arrays({"city_idx": ci, "subcat_idx": si, "price_idx": pi, "color_idx": ki,
+                             **{col: sig[i] for i, col in enumerate(SCORE_COLS)}},
+                            cities, subcats, prices, colors)
+    return add_score_norm(df, composite_range)
+
+def score_frame(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME) -> pd.DataFrame:
+    """Batched equivalent of pd.DataFrame([score_combination(*c, timeframe) for c in product(...)])."""
+    a = score_arrays(cities, subcats, prices, colors, timeframe)
+    return frame_from_arrays(a, cities, subcats, prices, colors)
+
+
+# ── Top-K selection ──────────────────────────────────────────────────────────
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest values, best first, via partial selection
+    (O(n) + O(k log k) instead of a full sort). Ties rank by position so the
+    result is deterministic.
+    """
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth    = np.partition(values, len(values) - k)[len(values) - k]
+    above  = np.flatnonzero(values > kth)
+    at_kth = np.flatnonzero(values == kth)[: k - len(above)]
+    idx    = np.concatenate([above, at_kth])
+    return idx[np.lexsort((idx, -values[idx]))]
+
+def top_k(df: pd.DataFrame, k: int, min_velocity: float = -np.inf, by: str = "score_norm") -> pd.DataFrame:
+    """The k highest-scoring rows with velocity >= min_velocity, ranked from 0."""
+    keep = np.flatnonzero(df["velocity"].to_numpy() >= min_velocity)
+    best = keep[top_k_indices(df[by].to_numpy()[keep], k)]
+    return df.iloc[best].reset_index(drop=True)
@@ -0,0 +1,82 @@
+"""
+Chunked export of score tables as CSV, Parquet or Arrow IPC.
+
+Rows are encoded one block at a time, so the full ~108K-row space never becomes a
+single in-memory string; the dashboard caches the encoded payload per selection.
+pyarrow is only needed for the Parquet and Arrow formats.
+"""
+import io
+
+import pandas as pd
+
+from .cache import master_cached
+from .cube import compute_all_combinations, master_data_version
+from .data import DEFAULT_TIMEFRAME
+
+EXPORT_FORMATS = {            # format → (file extension, MIME type)
+    "csv":     ("csv",     "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow":   ("arrow",   "application/vnd.apache.arrow.stream"),
+}
+EXPORT_CHUNK_ROWS = 16_384
+
+# Score-table column → analyst-facing header
+EXPORT_COLUMNS = {
+    "city": "City", "group": "Group", "subcat": "Sub-Category", "price": "Price",
+    "color": "Color", "color_hex": "Color Hex", "score_norm": "Trend Score",
+    "velocity": "Velocity %", "geo_score": "Geo Score", "cat_score": "Cat Score",
+    "price_score": "Price Score", "color_score": "Color Score",
+}
+
+
+def export_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The export columns of a score table, renamed for analysts."""
+    return df[list(EXPORT_COLUMNS)].rename(columns=EXPORT_COLUMNS)
+
+
+def iter_chunks(df: pd.DataFrame, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Yield df encoded as fmt, in byte chunks of about chunk_rows rows each."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    starts = range(0, max(len(df), 1), chunk_rows)
+    if fmt == "csv":
+        for lo in starts:
+            yield df.iloc[lo:lo + chunk_rows].to_csv(index=False, header=lo == 0).encode()
+        return
+
+    import pyarrow as pa
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    sink   = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    with writer:
+        for lo in starts:
+            writer.write_table(pa.Table.from_pandas(df.iloc[lo:lo + chunk_rows], schema=schema,
+                                                    preserve_index=False))
+            # Hand back what this row group / batch produced, then reuse the buffer
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()      # footer / end-of-stream marker
+
+
+def write_export(df: pd.DataFrame, fmt: str, fileobj, chunk_rows: int = EXPORT_CHUNK_ROWS) -> int:
+    """Stream df into a binary file object; returns the number of bytes written."""
+    n = 0
+    for chunk in iter_chunks(df, fmt, chunk_rows):
+        n += fileobj.write(chunk)
+    return n
+
+
+def selection_export(cities, subcats, prices, colors, fmt: str = "csv",
+                     timeframe: str = DEFAULT_TIMEFRAME) -> bytes:
+    """The whole scored selection as an export payload, cached alongside its score table."""
+    def build():
+        buf = io.BytesIO()
+        write_export(export_frame(compute_all_combinations(cities, subcats, prices, colors, timeframe)),
+                     fmt, buf)
+        return buf.getvalue()
+    return master_cached(("export", master_data_version(), fmt, timeframe, cities, subcats, prices, colors), build)
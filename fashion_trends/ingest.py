@@ -0,0 +1,243 @@
+"""
+Google Trends ingestion: interest-over-time for every CATEGORIES keyword, per
+city geo and TIMEFRAME_OPTIONS window, fetched in 5-keyword batches (the Trends
+limit) through a token-bucket scheduler with retries, into a persistent SQLite
+cache keyed by (keyword, geo, timeframe). The dashboard only ever reads the cache.
+
+Transports are pluggable: PyTrendsTransport talks to Google, RecordingTransport
+captures responses to a JSON-lines file, and ReplayTransport serves that file
+back so the pipeline runs offline.
+
+Note that Trends scales each request to its own peak, so values are comparable
+within a batch, not across batches.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .data import TIMEFRAME_OPTIONS, master_data
+
+BATCH_SIZE         = 5
+# Sampling interval → (points, unit) of the "recent average" shown for a series
+RECENT_WINDOWS     = ((timedelta(hours=1), 24, "h"), (timedelta(days=1), 7, "d"),
+                      (timedelta(weeks=1), 4, "w"))
+TRENDS_CACHE_PATH  = Path(os.environ.get("TRENDS_CACHE_PATH",
+                                         Path(__file__).resolve().parent.parent / ".trends_cache.sqlite"))
+
+
+class FetchError(Exception):
+    """A fetch failure not worth retrying (rejected payload, other HTTP 4xx)."""
+
+
+class TransientFetchError(FetchError):
+    """A fetch failure worth retrying (rate limit, timeout, 5xx)."""
+
+
+# ── Transports ────────────────────────────────────────────────────────────────
+# transport.fetch(keywords, geo, timeframe) → {keyword: {"dates": [iso...], "values": [int...]}}
+# dates are full ISO timestamps: "now 7-d" is sampled hourly, longer windows daily or weekly
+
+class PyTrendsTransport:
+    """Live Google Trends via pytrends (imported lazily — optional at runtime)."""
+
+    def __init__(self, hl: str = "en-IN", tz: int = -330, timeout=(10, 25)):
+        from pytrends.request import TrendReq
+        self._client = TrendReq(hl=hl, tz=tz, timeout=timeout)
+
+    def fetch(self, keywords, geo: str, timeframe: str) -> dict:
+        from pytrends.exceptions import ResponseError, TooManyRequestsError
+        from requests.exceptions import RequestException
+        try:
+            self._client.build_payload(list(keywords), timeframe=timeframe, geo=geo)
+            df = self._client.interest_over_time()
+        except TooManyRequestsError as exc:
+            raise TransientFetchError(str(exc)) from exc
+        except ResponseError as exc:             # 5xx is Google's side; a 400 will fail again
+            status = getattr(exc.response, "status_code", 0)
+            raise (TransientFetchError if status >= 500 else FetchError)(str(exc)) from exc
+        except RequestException as exc:          # timeouts and dropped connections, from requests
+            raise TransientFetchError(str(exc)) from exc
+        dates = [d.isoformat() for d in df.index] if len(df) else []
+        return {kw: {"dates": dates, "values": [int(v) for v in df[kw]] if kw in df else []}
+                for kw in keywords}
+
+
+class RecordingTransport:
+    """Wrap a transport and append every successful response to a JSON-lines file."""
+
+    def __init__(self, inner, path):
+        self.inner, self.path = inner, Path(path)
+
+    def fetch(self, keywords, geo: str, timeframe: str) -> dict:
+        series = self.inner.fetch(keywords, geo, timeframe)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"keywords": list(keywords), "geo": geo, "timeframe": timeframe,
+                                "series": series}, ensure_ascii=False) + "\n")
+        return series
+
+
+class ReplayTransport:
+    """Serve responses recorded by RecordingTransport; offline and deterministic."""
+
+    def __init__(self, path):
+        self._responses = {}
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                rec = json.loads(line)
+                self._responses[(tuple(rec["keywords"]), rec["geo"], rec["timeframe"])] = rec["series"]
+        self.calls = 0
+
+    def fetch(self, keywords, geo: str, timeframe: str) -> dict:
+        self.calls += 1
+        try:
+            return self._responses[(tuple(keywords), geo, timeframe)]
+        except KeyError:
+            raise LookupError(f"no recording for {list(keywords)} @ {geo} {timeframe}") from None
+
+
+# ── Scheduling ────────────────────────────────────────────────────────────────
+class TokenBucket:
+    """Allow `rate` requests per second on average, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock=time.monotonic, sleep=time.sleep):
+        self.rate, self.capacity = rate, capacity
+        self._clock, self._sleep = clock, sleep
+        self._tokens  = capacity
+        self._updated = clock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            now = self._clock()
+            self._tokens  = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            self._sleep((tokens - self._tokens) / self.rate)
+
+
+def fetch_with_retry(transport, bucket: TokenBucket, keywords, geo: str, timeframe: str,
+                     retries: int = 4, backoff: float = 2.0, sleep=time.sleep) -> dict:
+    """One rate-limited fetch; TransientFetchError is retried with exponential backoff."""
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        try:
+            return transport.fetch(keywords, geo, timeframe)
+        except TransientFetchError:
+            if attempt == retries:
+                raise
+            sleep(backoff * 2**attempt)
+
+
+# ── Persistent cache ──────────────────────────────────────────────────────────
+class TrendsCache:
+    """SQLite store of interest series keyed by (keyword, geo, timeframe)."""
+
+    def __init__(self, path=TRENDS_CACHE_PATH):
+        self.path = Path(path)
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS interest (
+                              keyword TEXT, geo TEXT, timeframe TEXT, fetched_at REAL, series TEXT,
+                              PRIMARY KEY (keyword, geo, timeframe))""")
+
+    @contextmanager
+    def _connect(self):
+        # A connection per call: cheap, and safe from Streamlit's per-session threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:                      # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, keyword: str, geo: str, timeframe: str, series: dict, fetched_at: float = None) -> None:
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO interest VALUES (?, ?, ?, ?, ?)",
+                       (keyword, geo, timeframe, fetched_at or time.time(), json.dumps(series)))
+
+    def get(self, keyword: str, geo: str, timeframe: str, max_age: float = None):
+        """The cached {"dates", "values"} series, or None if missing or older than max_age seconds."""
+        with self._connect() as db:
+            row = db.execute("SELECT fetched_at, series FROM interest WHERE keyword=? AND geo=? AND timeframe=?",
+                             (keyword, geo, timeframe)).fetchone()
+        if row is None or (max_age is not None and time.time() - row[0] > max_age):
+            return None
+        return json.loads(row[1])
+
+    def fresh_keys(self, geo: str, timeframe: str, max_age: float = None) -> set:
+        """Keywords already cached for (geo, timeframe), within max_age if given."""
+        cutoff = 0 if max_age is None else time.time() - max_age
+        with self._connect() as db:
+            rows = db.execute("SELECT keyword FROM interest WHERE geo=? AND timeframe=? AND fetched_at>=?",
+                              (geo, timeframe, cutoff)).fetchall()
+        return {r[0] for r in rows}
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+def keyword_batches(keywords, size: int = BATCH_SIZE):
+    keywords = list(dict.fromkeys(keywords))
+    return [keywords[i:i + size] for i in range(0, len(keywords), size)]
+
+
+def ingest(transport, cache: TrendsCache, cities=None, timeframes=None, keywords=None,
+           bucket: TokenBucket = None, max_age: float = None, retries: int = 4, sleep=time.sleep) -> dict:
+    """
+    Fill the cache for cities × timeframes (labels of TIMEFRAME_OPTIONS) × keywords,
+    skipping keywords already cached within max_age. Cities sharing a state geo
+    are fetched once. A batch that fails permanently, or still fails after
+    retries, is counted, not raised.
+    """
+    master     = master_data()
+    cities     = list(master.geo) if cities is None else cities
+    timeframes = list(TIMEFRAME_OPTIONS) if timeframes is None else timeframes
+    keywords   = list(master.subcat_keywords.values()) if keywords is None else keywords
+    bucket     = bucket or TokenBucket(rate=0.2, capacity=3)
+    stats      = {"batches": 0, "fetched": 0, "skipped": 0, "failed_batches": 0}
+
+    for geo in dict.fromkeys(master.geo[c] for c in cities):
+        for label in timeframes:
+            timeframe = TIMEFRAME_OPTIONS[label]
+            have      = cache.fresh_keys(geo, timeframe, max_age)
+            todo      = [kw for kw in keywords if kw not in have]
+            stats["skipped"] += len(keywords) - len(todo)
+            for batch in keyword_batches(todo):
+                stats["batches"] += 1
+                try:
+                    series = fetch_with_retry(transport, bucket, batch, geo, timeframe,
+                                              retries=retries, sleep=sleep)
+                except (FetchError, LookupError):
+                    stats["failed_batches"] += 1
+                    continue
+                for kw in batch:
+                    if series.get(kw, {}).get("values"):
+                        cache.put(kw, geo, timeframe, series[kw])
+                        stats["fetched"] += 1
+    return stats
+
+
+def cached_interest(city: str, subcat: str, timeframe_label: str, cache: TrendsCache = None):
+    """Read-only lookup used by the dashboard: the cached series for a card, or None."""
+    if cache is None:
+        if not TRENDS_CACHE_PATH.exists():
+            return None
+        cache = TrendsCache()
+    master = master_data()
+    return cache.get(master.subcat_keywords[subcat], master.geo[city], TIMEFRAME_OPTIONS[timeframe_label])
+
+
+def recent_window(dates) -> tuple:
+    """
+    (points, label) for the recent average of a series sampled at these ISO
+    timestamps, e.g. (24, "24h") hourly, (7, "7d") daily or (4, "4w") weekly:
+    the RECENT_WINDOWS interval nearest the median step, capped at the series length.
+    """
+    stamps = sorted(datetime.fromisoformat(d) for d in dates)
+    steps  = sorted(b - a for a, b in zip(stamps, stamps[1:]))
+    step   = steps[len(steps) // 2] if steps else timedelta(days=1)
+    _, points, unit = min(RECENT_WINDOWS, key=lambda w: abs(w[0] - step))
+    points = max(1, min(points, len(stamps)))
+    return points, f"{points}{unit}"
@@ -0,0 +1,114 @@
+"""
+Load-test harness for the HTTP service: N keep-alive clients replay a mix of
+/top and /aggregates queries against localhost for a fixed duration, then report
+throughput and latency percentiles.
+
+    python -m fashion_trends.loadtest --spawn --concurrency 64 --duration 10
+    python -m fashion_trends.loadtest --port 8765          # against a running service
+"""
+import argparse
+import asyncio
+import itertools
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+DEFAULT_MIX = [
+    "/top?n=5&min_velocity=0",
+    "/top?n=10&min_velocity=-35",
+    "/top?n=3&min_velocity=20&cities=Mumbai,Delhi,Bengaluru",
+    "/top?n=5&families=" + quote("Neutrals,Earth Tones"),
+    "/top?n=5&groups=" + quote("Sarees,Lehengas,Kurtas & Suits") + "&prices=" + quote("₹5K+"),
+    "/aggregates",
+    "/aggregates?cities=Jaipur,Surat",
+]
+
+
+async def _get(reader, writer, host: str, path: str) -> int:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, paths, deadline, latencies, failures) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            if time.perf_counter() >= deadline:
+                break
+            t0 = time.perf_counter()
+            status = await _get(reader, writer, host, path)
+            latencies.append(time.perf_counter() - t0)
+            if status != 200:
+                failures.append((status, path))
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, concurrency: int, duration: float, mix=DEFAULT_MIX) -> dict:
+    latencies, failures = [], []
+    deadline = time.perf_counter() + duration
+    start    = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, itertools.islice(itertools.cycle(mix), i, None), deadline, latencies, failures)
+        for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lat_ms  = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies), "failures": len(failures), "seconds": round(elapsed, 2),
+        "rps": round(len(latencies) / elapsed, 1),
+        **{f"p{q}_ms": round(float(np.percentile(lat_ms, q)), 2) for q in (50, 95, 99)},
+    }
+
+
+async def _wait_ready(host: str, port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            await _get(reader, writer, host, "/health")
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m fashion_trends.loadtest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--spawn", action="store_true", help="start a local service for the run")
+    parser.add_argument("--workers", type=int, default=4, help="service workers (with --spawn)")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, "-m", "fashion_trends", "serve", "--host", args.host,
+                                   "--port", str(args.port), "--workers", str(args.workers)])
+    try:
+        asyncio.run(_wait_ready(args.host, args.port))
+        report = asyncio.run(run(args.host, args.port, args.concurrency, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print("  ".join(f"{k}={v}" for k, v in report.items()))
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""
+Sharded multi-process scoring for catalogs too large to score in one pass.
+
+The cross-product is cut into shards of one city × a contiguous run of
+sub-categories, so every shard is a contiguous slice of product order. Each
+worker scores its shard with score_arrays and sends back compact int8 signals
+plus its composite min/max and a local top-K; the parent concatenates the
+signals in order and merges the local top-Ks into the global ranking. Scores
+are keyed by member names, so the result is identical to a single-process run.
+
+Workers never fork the caller: the service and the dashboard call this from
+threaded processes, so the pool starts from a forkserver (spawn where that
+is unavailable), and every shard carries the registry it must score with.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .data import DEFAULT_TIMEFRAME
+from .engine import SCORE_COLS, normalized_frame, score_arrays, top_k_indices
+from .registry import master_registry
+
+PARALLEL_MIN_COMBOS = 1_000_000     # below this a process pool costs more than it saves
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+if _MP_CONTEXT.get_start_method() == "forkserver":
+    _MP_CONTEXT.set_forkserver_preload(["fashion_trends.engine"])   # workers start with numpy + the engine loaded
+
+
+def default_workers() -> int:
+    """$SCORE_WORKERS, else the CPUs this process may run on."""
+    if os.environ.get("SCORE_WORKERS"):
+        return int(os.environ["SCORE_WORKERS"])
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def plan_shards(n_cities: int, n_subcats: int, workers: int) -> list:
+    """[(city_index, subcat_lo, subcat_hi)] — about two shards per worker, in product order."""
+    chunks = min(n_subcats, max(1, math.ceil(2 * workers / n_cities)))
+    bounds = np.linspace(0, n_subcats, chunks + 1).round().astype(int)
+    return [(c, int(lo), int(hi)) for c in range(n_cities) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _score_shard(cities, subcats, prices, colors, timeframe, k, min_velocity, registry):
+    """Worker: one shard's int8 signals, composite range and local top-K positions."""
+    a         = score_arrays(cities, subcats, prices, colors, timeframe, registry=registry)
+    composite = a["composite"]
+    keep      = np.flatnonzero(a["velocity"] >= min_velocity)
+    top       = keep[top_k_indices(composite[keep], k)]
+    signals   = np.stack([a[col] for col in SCORE_COLS]).astype(np.int8)
+    return signals, int(composite.min()), int(composite.max()), top
+
+
+def score_sharded(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                  k: int = 10, min_velocity: float = -np.inf, workers: int = None, registry=None) -> dict:
+    """
+    Score the full cross-product across a process pool.
+
+    Returns {"signals": (len(SCORE_COLS), N) int8 in product order, "composite_min",
+    "composite_max", "top": global positions of the k best composites with
+    velocity >= min_velocity, best first}. workers=1 scores in-process. Every
+    shard is scored with registry (default: master_registry()), sent to the workers.
+    """
+    cities, subcats, prices, colors = (tuple(d) for d in (cities, subcats, prices, colors))
+    workers  = workers or default_workers()
+    registry = registry or master_registry()
+    shards   = plan_shards(len(cities), len(subcats), workers)
+    jobs     = [((cities[c],), subcats[lo:hi], prices, colors, timeframe, k, min_velocity, registry)
+                for c, lo, hi in shards]
+    if workers == 1:
+        results = [_score_shard(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as pool:
+            results = list(pool.map(_score_shard, *zip(*jobs)))
+
+    signals = np.concatenate([r[0] for r in results], axis=1)
+    offsets = np.cumsum([0] + [r[0].shape[1] for r in results[:-1]])
+    # Candidates in position order so ties rank exactly as top_k_indices would on the full array
+    cand = np.sort(np.concatenate([off + r[3] for off, r in zip(offsets, results)]))
+    comp = signals[SCORE_COLS.index("composite")]
+    return {
+        "signals":       signals,
+        "composite_min": min(r[1] for r in results),
+        "composite_max": max(r[2] for r in results),
+        "top":           cand[top_k_indices(comp[cand], k)],
+    }
+
+
+def _frame(scored: dict, positions, cities, subcats, prices, colors) -> pd.DataFrame:
+    return normalized_frame(scored["signals"], positions, (scored["composite_min"], scored["composite_max"]),
+                            cities, subcats, prices, colors)
+
+
+def sharded_top_k(cities, subcats, prices, colors, k: int, min_velocity: float = -np.inf,
+                  timeframe: str = DEFAULT_TIMEFRAME, workers: int = None) -> pd.DataFrame:
+    """top_k(compute_all_combinations(...), k, min_velocity) for any catalog size, ranked from 0."""
+    scored = score_sharded(cities, subcats, prices, colors, timeframe, k, min_velocity, workers)
+    return _frame(scored, scored["top"], cities, subcats, prices, colors)
+
+
+def sharded_table(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                  workers: int = None) -> pd.DataFrame:
+    """The full normalized score table in product order, scored across the pool."""
+    scored = score_sharded(cities, subcats, prices, colors, timeframe, 0, workers=workers)
+    return _frame(scored, np.arange(scored["signals"].shape[1]), cities, subcats, prices, colors)
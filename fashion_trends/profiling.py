@@ -0,0 +1,115 @@
+"""
+Lightweight instrumentation for the render path: a lap timer that charges
+wall time to named sections, one structured log line per run, and optional
+whole-run profiling with cProfile or pyinstrument.
+
+    timings = Timings()
+    ...compute...
+    timings.lap("compute")        # time since the previous lap → "compute"
+    timings.log(run="dashboard")
+
+Profiling is opt-in through the environment: FASHION_TRENDS_PROFILE=cprofile|pyinstrument
+profiles every run, and FASHION_TRENDS_PROFILE=request only the runs whose caller
+asks for a mode (e.g. by query param). With the variable unset, requests are ignored.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+
+PROFILE_ENV   = "FASHION_TRENDS_PROFILE"
+PROFILE_MODES = ("cprofile", "pyinstrument")
+
+log = logging.getLogger("fashion_trends.timing")
+
+
+class Timings:
+    """Lap timer for one run; repeated laps with the same name accumulate."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock    = clock
+        self._started  = self._last = clock()
+        self.sections  = {}             # name → [seconds, calls], in first-seen order
+
+    def lap(self, name: str) -> None:
+        """Charge the time since the previous lap (or construction) to name."""
+        now     = self._clock()
+        section = self.sections.setdefault(name, [0.0, 0])
+        section[0] += now - self._last
+        section[1] += 1
+        self._last  = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self._started) * 1e3
+
+    def rows(self) -> list:
+        """[{section, calls, ms, share}] in first-seen order."""
+        total = max(self.total_ms, 1e-9)
+        return [{"section": name, "calls": calls, "ms": round(s * 1e3, 2),
+                 "share": round(s * 1e3 / total, 3)}
+                for name, (s, calls) in self.sections.items()]
+
+    def log(self, level: int = logging.INFO, **context) -> None:
+        """Emit the run as one JSON log line on the fashion_trends.timing logger."""
+        if log.isEnabledFor(level):
+            log.log(level, json.dumps({
+                "event": "timings", **context, "total_ms": round(self.total_ms, 2),
+                "sections": {r["section"]: r["ms"] for r in self.rows()},
+            }, default=str))
+
+
+def _mode(value: str):
+    value = (value or "").strip().lower()
+    return "cprofile" if value in ("1", "true", "on") else value
+
+
+def profile_mode(requested: str = None):
+    """
+    The profiler to run, or None: the requested mode if $FASHION_TRENDS_PROFILE
+    enables profiling at all, else the variable's own mode.
+    """
+    allowed = _mode(os.environ.get(PROFILE_ENV))
+    if allowed not in PROFILE_MODES + ("request",):
+        return None
+    mode = _mode(requested) or allowed
+    return mode if mode in PROFILE_MODES else None
+
+
+class RunProfiler:
+    """Whole-run profiler; start() / stop() bracket the run, stop() returns a text report."""
+
+    def __init__(self, mode: str, limit: int = 40):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"unknown profile mode: {mode}")
+        self.mode, self.limit = mode, limit
+        self.running = False
+        if mode == "pyinstrument":
+            from pyinstrument import Profiler     # optional dependency
+            self._profiler = Profiler()
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> "RunProfiler":
+        if self.mode == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        self.running = True
+        return self
+
+    def stop(self) -> str:
+        """Stop profiling and return the report; later calls only return None."""
+        if not self.running:
+            return None
+        self.running = False
+        if self.mode == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True, color=False)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(self.limit)
+        return out.getvalue()
@@ -0,0 +1,136 @@
+"""
+Indexed view of the master data for the scoring engine: integer codes per
+member, group and price-tier membership as bitmasks, and the profile
+multipliers compiled into dense factor tables (city × group, city × group ×
+price, city × color). Scoring a combination or a batch is array indexing into
+these tables instead of dict lookups and set-membership tests.
+
+master_registry() is built once per MasterData snapshot and stored on it, so
+a registry always matches the tables it was built from.
+"""
+import copy
+
+import numpy as np
+
+from .data import GROUP_SET_NAMES, MasterData, master_data
+
+# Group membership bits and price-tier bits, keyed by master-data set name
+WESTERN, ETHNIC, LUXURY, BUDGET, STREET = 1, 2, 4, 8, 16
+GROUP_BITS   = {"western": WESTERN, "ethnic": ETHNIC, "luxury": LUXURY, "budget": BUDGET, "street": STREET}
+PRICE_BITS   = {"luxury": LUXURY, "budget": BUDGET}
+# CITY_PROFILES multipliers, in city_mult column order
+MULTIPLIERS  = ("western", "ethnic", "streetwear", "luxury", "budget")
+# Factor-table layers, in the order the model applies (and truncates after) them
+CAT_FACTORS   = ((WESTERN, "western"), (ETHNIC, "ethnic"), (STREET, "streetwear"))
+PRICE_FACTORS = ((LUXURY, "luxury"), (BUDGET, "budget"))
+MARKET_SCALE = 42.0         # market_bn of the largest market → weight 1.0
+DIMS         = ("cities", "subcats", "prices", "colors")
+
+
+def _flags(names, sets, bits) -> np.ndarray:
+    return np.array([sum(bit for name, bit in bits.items() if n in sets[name]) for n in names], dtype=np.uint8)
+
+
+class MasterRegistry:
+    """
+    Codes and lookup arrays for one master-data snapshot. Per-member arrays end
+    with one neutral entry (no flags, multiplier 1.0) that codes() hands out for
+    names outside the master data, matching the dict-based model's defaults.
+
+    cat_mult[f, city, group] and price_mult[f, city, group, price] hold each
+    CAT_FACTORS / PRICE_FACTORS multiplier where it applies and 1.0 elsewhere;
+    color_mult[city, color] is the color pull. Groups are indexed by
+    subcat_group[subcat code].
+    """
+
+    def __init__(self, master: MasterData):
+        self.members = {
+            "cities":  tuple(master.cities),
+            "subcats": master.subcats,
+            "prices":  tuple(master.prices),
+            "colors":  tuple(master.colors),
+        }
+        self.index  = {dim: {n: i for i, n in enumerate(names)} for dim, names in self.members.items()}
+        self.groups = tuple(dict.fromkeys(master.subcat_to_group.values()))
+
+        group_code        = {g: i for i, g in enumerate(self.groups)}
+        self.group_flags  = np.append(_flags(self.groups, master.group_sets, GROUP_BITS), np.uint8(0))
+        self.subcat_group = np.array([group_code[master.subcat_to_group[s]] for s in self.members["subcats"]]
+                                     + [len(self.groups)], dtype=np.intp)
+        self.subcat_flags = self.group_flags[self.subcat_group]
+        self.price_flags  = np.append(_flags(self.members["prices"], master.price_sets, PRICE_BITS), np.uint8(0))
+
+        cities = self.members["cities"]
+        self.market_weight = np.array([master.cities[c]["market_bn"] for c in cities]) / MARKET_SCALE
+        self.city_mult     = np.ones((len(cities), len(MULTIPLIERS)))
+        self.color_mult    = np.ones((len(cities), len(self.members["colors"]) + 1))
+        for i, c in enumerate(cities):
+            self._set_profile(i, master.profiles.get(c, {}))
+        self._compile()
+
+    def _set_profile(self, i: int, profile: dict) -> None:
+        self.city_mult[i]  = [profile.get(m, 1.0) for m in MULTIPLIERS]
+        self.color_mult[i] = 1.0
+        for color, m in profile.get("colors", {}).items():
+            self.color_mult[i, self.index["colors"][color]] = m
+
+    def _compile(self) -> None:
+        """Rebuild the dense factor tables from city_mult and the group / price bitmasks."""
+        has = lambda flags, bit: (flags & bit) != 0
+        col = lambda key: self.city_mult[:, MULTIPLIERS.index(key)]
+        self.cat_mult = np.stack([
+            np.where(has(self.group_flags, bit)[None, :], col(key)[:, None], 1.0)
+            for bit, key in CAT_FACTORS])                                       # (3, city, group)
+        self.price_mult = np.stack([
+            np.where((has(self.group_flags, bit)[:, None] & has(self.price_flags, bit)[None, :])[None],
+                     col(key)[:, None, None], 1.0)
+            for bit, key in PRICE_FACTORS])                                     # (2, city, group, price)
+
+    def with_profile(self, city: str, profile: dict) -> "MasterRegistry":
+        """A copy scoring city with this profile entry instead; the master data is untouched."""
+        reg = copy.copy(self)
+        reg.city_mult, reg.color_mult = self.city_mult.copy(), self.color_mult.copy()
+        reg._set_profile(self.index["cities"][city], profile)
+        reg._compile()
+        return reg
+
+    def codes(self, dim: str, names, strict: bool = False) -> np.ndarray:
+        """Integer codes of names; unknown names get the neutral entry, or KeyError if strict."""
+        index = self.index[dim]
+        if strict:
+            return np.array([index[n] for n in names], dtype=np.intp)
+        neutral = len(index)
+        return np.array([index.get(n, neutral) for n in names], dtype=np.intp)
+
+
+def master_registry(master: MasterData = None) -> MasterRegistry:
+    """The registry of a snapshot (default: master_data()), built once and kept on it."""
+    master = master or master_data()
+    return master.derive("registry", lambda: MasterRegistry(master))
+
+
+def member_records(master: MasterData = None) -> dict:
+    """
+    {dim: {member: everything the master data says about it}} in cube dimension
+    order. Two snapshots differ for a member exactly when its cached scores or
+    labels may have changed.
+    """
+    m = master or master_data()
+    group_sets = lambda g: [name for name in GROUP_SET_NAMES if g in m.group_sets[name]]
+    return {
+        "cities":  {c: (m.cities[c], m.profiles.get(c), m.geo.get(c)) for c in m.cities},
+        "subcats": {s: (g, m.subcat_keywords.get(s), group_sets(g)) for s, g in m.subcat_to_group.items()},
+        "prices":  {p: (m.prices[p], p in m.price_sets["luxury"], p in m.price_sets["budget"]) for p in m.prices},
+        "colors":  {k: m.colors[k] for k in m.colors},
+    }
+
+
+def diff_records(before: dict, after: dict) -> dict:
+    """{dim: frozenset of members added, removed or changed} between two member_records()."""
+    changed = {}
+    for dim in DIMS:
+        old, new = before[dim], after[dim]
+        names = {n for n in old.keys() | new.keys() if old.get(n) != new.get(n)}
+        if names:
+            changed[dim] = frozenset(names)
+    return changed
@@ -0,0 +1,209 @@
+"""
+Lightweight HTTP/JSON query service over the scoring engine.
+
+asyncio handles connections (HTTP/1.1 keep-alive, stdlib only); each query is
+offloaded to a thread pool whose workers share the process-wide score cube and
+result cache, so concurrent clients never rescore the same selection twice.
+
+    GET /health                       → status + master-data version and file revision
+    GET /top?n=5&min_velocity=0&...   → ranked Top-N rows
+    GET /aggregates?...               → header stats, marginal/pairwise means, histogram
+    GET /stats                        → request and cache counters
+
+Selection parameters (cities, groups, prices, colors, families) may repeat or be
+comma-separated, e.g. /top?cities=Mumbai,Delhi&families=Neutrals. `timeframe`
+picks the scoring window (a TIMEFRAME_OPTIONS label, default "Last 30 days");
+min_velocity defaults to 0, as in the CLI and the dashboard.
+"""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .aggregates import compute_aggregates
+from .cache import ScoreCache, score_cache
+from .cube import compute_all_combinations, master_data_version, refresh_master_data, score_cube
+from .data import (
+    DEFAULT_TIMEFRAME, TIMEFRAME_OPTIONS, check_selection, latest_master_data, make_selection,
+    master_data_info, pinned_master_data,
+)
+from .engine import top_k
+
+SELECTION_PARAMS = ("cities", "groups", "prices", "colors", "families")
+CACHED_ROUTES    = ("/top", "/aggregates")
+
+log = logging.getLogger("fashion_trends.service")
+
+
+def _json_default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    return str(o)
+
+
+def _matrix(df) -> dict:
+    """{row: {col: mean}} with absent pairs as null."""
+    return {str(r): {str(c): (None if np.isnan(v) else float(v)) for c, v in zip(df.columns, vals)}
+            for r, vals in zip(df.index, df.to_numpy())}
+
+
+def parse_selection(query: dict):
+    """Selection tuples from parsed query-string values; ValueError on unknown names."""
+    names = {}
+    for key in SELECTION_PARAMS:
+        values = [v for raw in query.get(key, []) for v in raw.split(",") if v]
+        names[key] = values or None
+    check_selection(**names)
+    selection = make_selection(**names)
+    if not all(selection):
+        raise ValueError("the selection is empty in at least one dimension")
+    return selection
+
+
+def parse_timeframe(query: dict) -> str:
+    timeframe = query.get("timeframe", [DEFAULT_TIMEFRAME])[0]
+    if timeframe not in TIMEFRAME_OPTIONS:
+        raise ValueError(f"unknown timeframe: {timeframe}")
+    return timeframe
+
+
+def query_top(query: dict) -> dict:
+    selection = parse_selection(query)
+    n         = int(query.get("n", ["5"])[0])
+    min_vel   = float(query.get("min_velocity", ["0"])[0])     # the CLI's and dashboard's default
+    timeframe = parse_timeframe(query)
+    rows      = top_k(compute_all_combinations(*selection, timeframe), n, min_vel)
+    rows      = rows.assign(score_norm=rows["score_norm"].astype(np.float64).round(1))
+    return {"n": n, "min_velocity": min_vel, "timeframe": timeframe,
+            "rows": rows.astype(object).to_dict(orient="records")}
+
+
+def query_aggregates(query: dict) -> dict:
+    timeframe = parse_timeframe(query)
+    agg       = compute_aggregates(*parse_selection(query), timeframe)
+    return {
+        "timeframe": timeframe,
+        "total": agg["total"], "above_75": agg["above_75"], "avg_velocity": agg["avg_velocity"],
+        "marginal":    {dim: {str(k): float(v) for k, v in s.items()} for dim, s in agg["marginal"].items()},
+        "group_city":  _matrix(agg["group_city"]),
+        "price_group": _matrix(agg["price_group"]),
+        "color_city":  _matrix(agg["color_city"]),
+        "histogram":   {"edges": agg["hist_edges"], "counts": agg["hist_counts"]},
+    }
+
+
+class TrendService:
+    """asyncio front end + thread-pool back end; one instance per process."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, workers: int = 4):
+        self.host, self.port = host, port
+        self.pool      = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="score")
+        self.responses = ScoreCache(max_entries=4096, max_bytes=64 * 2**20)   # encoded JSON bodies
+        self.requests  = self.errors = 0
+        self.started   = time.monotonic()
+        self.routes    = {
+            "/health":     lambda q: {"status": "ok", "version": master_data_version(), **master_data_info()},
+            "/top":        query_top,
+            "/aggregates": query_aggregates,
+            "/stats":      lambda q: self.stats(),
+        }
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors,
+                "uptime_s": round(time.monotonic() - self.started, 1),
+                "cache": score_cache().stats(), "response_cache": self.responses.stats()}
+
+    def _respond(self, path: str, query: dict) -> bytes:
+        """
+        Run in a worker: compute the payload and serialize it off the event loop.
+        The whole request reads one pinned master-data snapshot. Query responses
+        are cached as encoded bytes, keyed by path + parameters. A master-data
+        reload drops them all (their keys are raw query strings, so they can't be
+        matched to members), and a body built from a replaced snapshot is never
+        stored; the score tables beneath are evicted selectively by
+        refresh_master_data and rebuild the bodies cheaply.
+        """
+        if refresh_master_data():
+            self.responses.clear()
+        with pinned_master_data() as master:
+            encode = lambda: json.dumps(self.routes[path](query), default=_json_default,
+                                        ensure_ascii=False).encode()
+            if path not in CACHED_ROUTES:
+                return encode()
+            key = ("http", path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+            return self.responses.get_or_compute(key, encode, keep=lambda: master is latest_master_data())
+
+    async def dispatch(self, method: str, target: str):
+        url   = urlsplit(target)
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "only GET is supported"}
+        if url.path not in self.routes:
+            return HTTPStatus.NOT_FOUND, {"error": f"no route {url.path}"}
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(
+                self.pool, self._respond, url.path, parse_qs(url.query))
+        except ValueError as exc:
+            return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+        except Exception as exc:
+            # Anything else is a server fault: answer it (keeping the connection) and count it
+            log.exception("%s failed", target)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"}
+        return HTTPStatus.OK, body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                status, body = await self.dispatch(method, target)
+                if status != HTTPStatus.OK:
+                    self.errors += 1
+                    body = json.dumps(body).encode()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> asyncio.AbstractServer:
+        # Build or map the score store (every window) before accepting traffic
+        await asyncio.get_running_loop().run_in_executor(self.pool, score_cube)
+        return await asyncio.start_server(self.handle, self.host, self.port, backlog=1024)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = 4) -> None:
+    """Run the service until interrupted."""
+    async def main():
+        service = TrendService(host, port, workers)
+        server  = await service.start()
+        print(f"fashion_trends service on http://{host}:{port} ({workers} workers)", flush=True)
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,187 @@
+"""
+Out-of-core scoring: the cross-product streamed in bounded chunks.
+
+compute_all_combinations materializes a selection as one DataFrame, which stops
+scaling once the catalog grows far past the master data. iter_combinations
+scores the space chunk by chunk instead, and StreamSummary folds the chunks into
+everything the dashboard reads off the full table (composite range, top-K, score
+histogram, marginal and pairwise means, per-city ranks) in memory that depends
+on the dimension sizes, never on their product.
+
+score_norm needs the final composite range, so the summary counts rows per
+composite value (composites are integers in [5, 100]) and only normalizes at
+the end. The results equal build_aggregates / top_k / city_rankings on the full table.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import HIST_BINS
+from .data import DEFAULT_TIMEFRAME, master_data
+from .engine import SCORE_COLS, frame_from_arrays, score_arrays, top_k_indices
+
+STREAM_CHUNK_ROWS = 65_536
+COMPOSITE_VALUES  = np.arange(5, 101)      # score_arrays clips composite to [5, 100]
+_INDEX_COLS       = ("city_idx", "subcat_idx", "price_idx", "color_idx")
+
+# Aggregate table → the dimensions it is keyed by (marginals, then the analytics pairs)
+_TABLES = {
+    "city": ("city",), "group": ("group",), "price": ("price",), "color": ("color",),
+    "group_city": ("group", "city"), "price_group": ("price", "group"), "color_city": ("color", "city"),
+}
+
+
+def chunk_bounds(n_cities: int, n_subcats: int, rows_per_subcat: int, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """Yield (city_index, subcat_lo, subcat_hi) blocks of at most chunk_rows rows, in product order."""
+    step = max(1, chunk_rows // max(rows_per_subcat, 1))
+    for c in range(n_cities):
+        for lo in range(0, n_subcats, step):
+            yield c, lo, min(lo + step, n_subcats)
+
+
+def iter_scored(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                chunk_rows: int = STREAM_CHUNK_ROWS):
+    """Yield (offset, score_arrays-style dict) per chunk; indices and offset are global."""
+    cities, subcats, prices, colors = (tuple(d) for d in (cities, subcats, prices, colors))
+    rows_per_subcat = len(prices) * len(colors)
+    for c, lo, hi in chunk_bounds(len(cities), len(subcats), rows_per_subcat, chunk_rows):
+        a = score_arrays((cities[c],), subcats[lo:hi], prices, colors, timeframe)
+        a["city_idx"]   = np.full_like(a["city_idx"], c)
+        a["subcat_idx"] = a["subcat_idx"] + lo
+        yield (c * len(subcats) + lo) * rows_per_subcat, a
+
+
+def iter_combinations(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                      chunk_rows: int = STREAM_CHUNK_ROWS):
+    """
+    Yield the score table in product-order chunks, indexed by global position.
+    Chunks carry the raw signals only: score_norm needs the whole space's
+    composite range, which StreamSummary provides.
+    """
+    for offset, a in iter_scored(cities, subcats, prices, colors, timeframe, chunk_rows):
+        df = frame_from_arrays(a, cities, subcats, prices, colors)
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        yield df
+
+
+class StreamSummary:
+    """Running min/max, top-K, composite-value counts and velocity sum over scored chunks."""
+
+    def __init__(self, cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                 k: int = 10, min_velocity: float = -np.inf):
+        self.dims      = tuple(tuple(d) for d in (cities, subcats, prices, colors))
+        self.timeframe = timeframe
+        self.k, self.min_velocity = k, min_velocity
+        # Same group coding as frame_from_arrays
+        group_of       = master_data().subcat_to_group.get
+        self.groups    = sorted(set(group_of(s, "") for s in subcats))
+        self._subcat_group = np.array([self.groups.index(group_of(s, "")) for s in subcats], dtype=np.intp)
+        self._cats   = {"city": self.dims[0], "group": self.groups, "price": self.dims[2], "color": self.dims[3]}
+        self._shapes = {name: tuple(len(self._cats[d]) for d in dims) for name, dims in _TABLES.items()}
+        self.counts  = {name: np.zeros(math.prod(shape) * len(COMPOSITE_VALUES), dtype=np.int64)
+                        for name, shape in self._shapes.items()}
+        self.total, self.velocity_sum = 0, 0
+        self.composite_min, self.composite_max = np.inf, -np.inf
+        # Bounded top-K buffer: the best k rows seen so far, kept in position order
+        self._top_pos  = np.empty(0, dtype=np.int64)
+        self._top_rows = {col: np.empty(0, dtype=np.int64) for col in _INDEX_COLS + tuple(SCORE_COLS)}
+
+    def update(self, offset: int, a: dict) -> None:
+        """Fold one chunk from iter_scored into the running state."""
+        composite = a["composite"]
+        value     = composite - COMPOSITE_VALUES[0]
+        codes     = {"city": a["city_idx"], "group": self._subcat_group[a["subcat_idx"]],
+                     "price": a["price_idx"], "color": a["color_idx"]}
+        for name, dims in _TABLES.items():
+            cell = np.ravel_multi_index(tuple(codes[d] for d in dims), self._shapes[name])
+            self.counts[name] += np.bincount(cell * len(COMPOSITE_VALUES) + value,
+                                             minlength=len(self.counts[name]))
+        self.total        += len(composite)
+        self.velocity_sum += int(a["velocity"].sum())
+        self.composite_min = min(self.composite_min, int(composite.min()))
+        self.composite_max = max(self.composite_max, int(composite.max()))
+
+        keep  = np.flatnonzero(a["velocity"] >= self.min_velocity)
+        local = keep[top_k_indices(composite[keep], self.k)]
+        local.sort()
+        # Earlier chunks hold earlier positions, so the merged candidates stay in position order
+        pos  = np.concatenate([self._top_pos, offset + local])
+        rows = {col: np.concatenate([self._top_rows[col], a[col][local]]) for col in self._top_rows}
+        best = np.sort(top_k_indices(rows["composite"], self.k))
+        self._top_pos  = pos[best]
+        self._top_rows = {col: v[best] for col, v in rows.items()}
+
+    def consume(self, chunks) -> "StreamSummary":
+        for offset, a in chunks:
+            self.update(offset, a)
+        return self
+
+    # ── Results ──
+    def score_norm(self) -> np.ndarray:
+        """score_norm of every COMPOSITE_VALUES entry, exactly as compute_all_combinations rounds it."""
+        mn, mx = self.composite_min, self.composite_max
+        return ((COMPOSITE_VALUES - mn) / (mx - mn) * 100).round(1).astype(np.float32).astype(np.float64)
+
+    def top(self) -> pd.DataFrame:
+        """top_k(table, k, min_velocity), ranked from 0; index is unused, like top_k's."""
+        order = top_k_indices(self._top_rows["composite"], self.k)
+        df = frame_from_arrays({col: v[order] for col, v in self._top_rows.items()}, *self.dims)
+        df["score_norm"] = self.score_norm()[self._top_rows["composite"][order] - COMPOSITE_VALUES[0]]
+        df["score_norm"] = df["score_norm"].astype(np.float32)
+        return df
+
+    def top_positions(self) -> np.ndarray:
+        """Global product-order positions of top(), best first."""
+        return self._top_pos[top_k_indices(self._top_rows["composite"], self.k)]
+
+    def aggregates(self) -> dict:
+        """The build_aggregates dict for the streamed space."""
+        norm = self.score_norm()
+
+        def means(name):
+            c   = self.counts[name].reshape(self._shapes[name] + (len(COMPOSITE_VALUES),))
+            cnt = c.sum(axis=-1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return (c @ norm) / cnt         # NaN where a pair is absent
+
+        cats = {d: pd.Index(list(v), name=d) for d, v in self._cats.items()}
+        pair = lambda name: pd.DataFrame(means(name), index=cats[_TABLES[name][0]], columns=cats[_TABLES[name][1]])
+        per_value = self.counts["city"].reshape(-1, len(COMPOSITE_VALUES)).sum(axis=0)
+        hist_counts, hist_edges = np.histogram(norm, bins=HIST_BINS, range=(0, 100), weights=per_value)
+        return {
+            "total":        self.total,
+            "above_75":     int(per_value[norm >= 75].sum()),
+            "avg_velocity": self.velocity_sum / self.total,
+            "marginal":     {d: pd.Series(means(d), index=cats[d], name="score_norm") for d in cats},
+            "group_city":   pair("group_city"),
+            "price_group":  pair("price_group"),
+            "color_city":   pair("color_city"),
+            "hist_counts":  hist_counts.astype(np.int64),
+            "hist_edges":   hist_edges,
+        }
+
+    def city_rankings(self, top: pd.DataFrame, cities=None):
+        """
+        city_rankings for the streamed space: each top row's composite and its rank
+        in every city (default: all streamed cities), from the per-city value counts.
+        Only the len(top) × len(cities) card cells are rescored.
+        """
+        cities = self.dims[0] if cities is None else tuple(cities)
+        ci     = np.array([self.dims[0].index(c) for c in cities], dtype=np.intp)
+        composite = np.stack([
+            score_arrays(cities, (s,), (p,), (k,), self.timeframe)["composite"]
+            for s, p, k in zip(top["subcat"], top["price"], top["color"])
+        ]).reshape(len(top), len(cities))
+        per_city = self.counts["city"].reshape(len(self.dims[0]), len(COMPOSITE_VALUES))[ci]
+        # above[c, v] = rows of city c with a composite strictly greater than COMPOSITE_VALUES[v]
+        above = per_city[:, ::-1].cumsum(axis=1)[:, ::-1] - per_city
+        rank  = above[np.arange(len(ci))[None, :], composite - COMPOSITE_VALUES[0]] + 1
+        return composite, rank
+
+
+def stream_summary(cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME, k: int = 10,
+                   min_velocity: float = -np.inf, chunk_rows: int = STREAM_CHUNK_ROWS) -> StreamSummary:
+    """Score the whole space chunk by chunk and return the folded summary."""
+    summary = StreamSummary(cities, subcats, prices, colors, timeframe, k, min_velocity)
+    return summary.consume(iter_scored(cities, subcats, prices, colors, timeframe, chunk_rows))
@@ -0,0 +1,104 @@
+"""
+Per-combination trend series (the card sparklines), generated in batches.
+
+Every series is base + trend + wave + noise. trend and wave are the same for all
+combinations, so they are built once per length; base and noise are counter-based
+draws keyed by the combination, so any row can be regenerated on its own and a
+whole selection comes out of a few array operations.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from .noise import combo_keys, member_keys, mix64, stable_key, uniforms
+
+TS_DAYS   = 60
+TS_CHUNK  = 16_384      # rows drawn per block, bounds the float64 scratch to ~8 MB
+_TS_KEY   = np.uint64(stable_key("ts"))
+
+
+@functools.lru_cache(maxsize=8)
+def ts_basis(n: int = TS_DAYS) -> np.ndarray:
+    """The shared trend + wave component of every length-n series (read-only)."""
+    trend = np.linspace(-10, 25, n)
+    wave  = 8 * np.sin(np.linspace(0, 3*np.pi, n))
+    basis = trend + wave
+    basis.flags.writeable = False
+    return basis
+
+
+def _series_from_keys(keys: np.ndarray, n: int) -> np.ndarray:
+    basis = ts_basis(n)
+    half  = (n + 1) // 2
+    out   = np.empty((len(keys), n), dtype=np.int8)
+    for lo in range(0, len(keys), TS_CHUNK):
+        u     = uniforms(mix64(keys[lo:lo + TS_CHUNK] ^ _TS_KEY), 1 + 2*half)
+        base  = 35 + np.floor(u[:, 0] * 33)                 # integers(35, 68)
+        # Box–Muller: each uniform pair gives two of the day-by-day normal(0, 6) draws
+        r     = np.sqrt(-2.0 * np.log1p(-u[:, 1:1 + half]))
+        theta = 2.0 * np.pi * u[:, 1 + half:]
+        noise = 6 * np.concatenate([r * np.cos(theta), r * np.sin(theta)], axis=1)[:, :n]
+        out[lo:lo + TS_CHUNK] = np.clip(base[:, None] + basis + noise, 0, 100)
+    return out
+
+
+def timeseries_batch(cities, subcats, prices, colors, n: int = TS_DAYS) -> np.ndarray:
+    """(N, n) int8 sparklines for N combinations given as aligned name sequences."""
+    keys = combo_keys(member_keys(cities), member_keys(subcats), member_keys(prices), member_keys(colors))
+    return _series_from_keys(keys, n)
+
+
+def timeseries_for_frame(df: pd.DataFrame, n: int = TS_DAYS) -> np.ndarray:
+    """
+    timeseries_batch for every row of a score table. Member keys are hashed once
+    per category and gathered by code, so the full space costs one pass.
+    """
+    parts = []
+    for col in ("city", "subcat", "price", "color"):
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            parts.append(member_keys(s.cat.categories)[s.cat.codes.to_numpy()])
+        else:
+            parts.append(member_keys(s))
+    return _series_from_keys(combo_keys(*parts), n)
+
+
+def timeseries_for_combo(city, subcat, price, color, n=TS_DAYS):
+    """Generate a trend sparkline for a specific combination."""
+    return timeseries_batch((city,), (subcat,), (price,), (color,), n)[0].astype(int)
+
+
+def rolling_mean(series: np.ndarray, window: int = 7) -> np.ndarray:
+    """(N, n − window + 1) trailing means along each row, via one cumulative sum."""
+    c = np.cumsum(series, axis=1, dtype=np.int64)
+    c = np.concatenate([np.zeros((len(series), 1), dtype=np.int64), c], axis=1)
+    return ((c[:, window:] - c[:, :-window]) / window).astype(np.float32)
+
+
+def _slope(y: np.ndarray) -> np.ndarray:
+    """Least-squares slope per row, in points per day."""
+    x = np.arange(y.shape[1], dtype=np.float64)
+    x -= x.mean()
+    return (y @ x) / (x @ x)
+
+
+def series_stats(series: np.ndarray, window: int = 7, recent: int = 14) -> pd.DataFrame:
+    """
+    Summary stats for a batch of series, one row per series:
+    peak / peak_day, the last and previous `window`-day means, the slope over the
+    whole series and over the last `recent` days, and acceleration = recent − overall slope.
+    """
+    y     = series.astype(np.float64)
+    roll  = rolling_mean(series, window)
+    slope = _slope(y)
+    rslope = _slope(y[:, -recent:])
+    return pd.DataFrame({
+        "peak":         series.max(axis=1).astype(np.int8),
+        "peak_day":     series.argmax(axis=1).astype(np.int16),
+        "avg_last":     roll[:, -1],
+        "avg_prev":     roll[:, -1 - window] if roll.shape[1] > window else np.nan,
+        "slope":        slope.astype(np.float32),
+        "recent_slope": rslope.astype(np.float32),
+        "acceleration": (rslope - slope).astype(np.float32),
+    })
@@ -0,0 +1,129 @@
+"""
+What-if tuning of city profiles without rescoring the whole space.
+
+A WhatIfSession holds a private copy of one selection's signals (sliced from the
+score cube) plus the running state the ranking depends on: how many rows carry
+each composite value, which gives the min/max behind score_norm, and each
+city's local top-K. apply() swaps one city's profile in a copy of the registry
+and rescores only what that profile touches: the city's whole slice for a
+western/ethnic/streetwear/luxury/budget change, or just the city × color
+columns for a color weight. It then patches the counts and that city's top-K,
+so an iteration costs one slice instead of the full cross-product.
+
+    session = WhatIfSession(*make_selection(), k=10, min_velocity=0)
+    session.apply("Bengaluru", streetwear=1.8)
+    session.apply("Jaipur", colors={"Pink": 1.7})
+    session.top()
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cube import score_cube, slice_cube
+from .data import DEFAULT_TIMEFRAME, master_data
+from .engine import SCORE_COLS, normalized_frame, score_arrays, top_k_indices
+from .registry import MULTIPLIERS, master_registry
+
+COMPOSITE_LO, COMPOSITE_HI = 5, 100       # score_arrays clips composite to this range
+_COMPOSITE = SCORE_COLS.index("composite")
+
+
+class WhatIfSession:
+    """One analyst's tuning state over a selection; the master data and cube are never modified."""
+
+    def __init__(self, cities, subcats, prices, colors, timeframe: str = DEFAULT_TIMEFRAME,
+                 k: int = 10, min_velocity: float = -np.inf):
+        self.dims      = tuple(tuple(d) for d in (cities, subcats, prices, colors))
+        self.timeframe = timeframe
+        self.k, self.min_velocity = k, min_velocity
+        self.shape     = tuple(len(d) for d in self.dims)
+        self.master    = master_data()       # the snapshot the whole session scores against
+        self.registry  = master_registry(self.master)
+        self.profiles  = {}                 # city → the profile applied so far
+
+        a = slice_cube(score_cube(timeframe, self.master), *self.dims)
+        self.signals = np.stack([a[col] for col in SCORE_COLS]).astype(np.int8)     # (signals, N) copy
+        self._block  = self.signals.reshape((len(SCORE_COLS),) + self.shape)        # per-dimension view
+        # Velocity never depends on a profile, so the filter is fixed for the session
+        self._eligible = (a["velocity"] >= min_velocity).reshape(self.shape[0], -1)
+        self.counts    = self._value_counts(self.signals[_COMPOSITE])
+        self._city_top = [self._top_of_city(c) for c in range(self.shape[0])]
+
+    # ── Running state ──
+    @staticmethod
+    def _value_counts(composite: np.ndarray) -> np.ndarray:
+        return np.bincount(composite.ravel().astype(np.intp) - COMPOSITE_LO,
+                           minlength=COMPOSITE_HI - COMPOSITE_LO + 1)
+
+    @property
+    def composite_range(self) -> tuple:
+        """(min, max) composite of the selection — the score_norm scale."""
+        present = np.flatnonzero(self.counts)
+        return int(present[0]) + COMPOSITE_LO, int(present[-1]) + COMPOSITE_LO
+
+    def _top_of_city(self, c: int) -> np.ndarray:
+        """Product-order positions of city c's best k eligible rows, ascending."""
+        comp = self._block[_COMPOSITE, c].ravel()
+        keep = np.flatnonzero(self._eligible[c])
+        return np.sort(keep[top_k_indices(comp[keep], self.k)]) + c * comp.size
+
+    # ── Tuning ──
+    def profile(self, city: str) -> dict:
+        """The profile city is currently scored with."""
+        return self.profiles.get(city) or self.master.profiles.get(city, {})
+
+    def apply(self, city: str, colors: dict = None, **multipliers) -> dict:
+        """
+        Change some of city's multipliers (western=..., streetwear=...) and/or color
+        weights (colors={"Pink": 1.7}) and rescore only the affected rows.
+        Returns {"city", "rows" rescored, "ms", "composite_min", "composite_max"}.
+        """
+        if city not in self.dims[0]:
+            raise ValueError(f"{city} is not in the selection")
+        unknown = [m for m in multipliers if m not in MULTIPLIERS] + [k for k in colors or () if k not in self.master.colors]
+        if unknown:
+            raise ValueError(f"unknown multipliers or colors: {', '.join(unknown)}")
+        started = time.perf_counter()
+        profile = self.profile(city)
+        profile = {**profile, **multipliers, "colors": {**profile.get("colors", {}), **(colors or {})}}
+        self.registry       = self.registry.with_profile(city, profile)
+        self.profiles[city] = profile
+
+        c = self.dims[0].index(city)
+        if multipliers:
+            columns = None                  # a category / price factor moves the whole city
+            sel     = ((city,),) + self.dims[1:]
+        else:
+            columns = np.array([self.dims[3].index(k) for k in colors or () if k in self.dims[3]], dtype=np.intp)
+            sel     = ((city,), self.dims[1], self.dims[2], tuple(self.dims[3][i] for i in columns))
+        rows = 0
+        if columns is None or len(columns):
+            a   = score_arrays(*sel, self.timeframe, registry=self.registry)
+            new = np.stack([a[col] for col in SCORE_COLS]).astype(np.int8)
+            new = new.reshape((len(SCORE_COLS),) + tuple(len(d) for d in sel[1:]))
+            # Swap the slice in place and move its rows between composite-value counts
+            city_block = self._block[:, c]
+            target = (Ellipsis,) if columns is None else (Ellipsis, columns)
+            self.counts -= self._value_counts(city_block[_COMPOSITE][target])
+            city_block[target] = new
+            self.counts += self._value_counts(new[_COMPOSITE])
+            self._city_top[c] = self._top_of_city(c)
+            rows = new[0].size
+        mn, mx = self.composite_range
+        return {"city": city, "rows": rows, "ms": round((time.perf_counter() - started) * 1e3, 2),
+                "composite_min": mn, "composite_max": mx}
+
+    # ── Results ──
+    def top_positions(self, k: int = None) -> np.ndarray:
+        """Global product-order positions of the best k eligible rows (k ≤ the session's k), best first."""
+        cand = np.concatenate(self._city_top)     # every city's candidates, already in position order
+        return cand[top_k_indices(self.signals[_COMPOSITE, cand], min(k or self.k, self.k))]
+
+    def top(self, k: int = None) -> pd.DataFrame:
+        """top_k(table, k, min_velocity) under the profiles applied so far, ranked from 0."""
+        return normalized_frame(self.signals, self.top_positions(k), self.composite_range, *self.dims)
+
+    def table(self) -> pd.DataFrame:
+        """The whole what-if score table in product order (materializes every row)."""
+        return normalized_frame(self.signals, np.arange(self.signals.shape[1]), self.composite_range, *self.dims)
@@ -0,0 +1,14 @@
+"""Keep the suite off the source tree: the score store lives in a per-session temp dir."""
+import pytest
+
+from fashion_trends import cube
+
+
+@pytest.fixture(scope="session", autouse=True)
+def score_store_dir(tmp_path_factory):
+    """Point SCORE_STORE_DIR (here and in any worker process) at a fresh directory."""
+    path = tmp_path_factory.mktemp("score_store")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(cube, "SCORE_STORE_DIR", path)
+        mp.setenv("SCORE_STORE_DIR", str(path))
+        yield path
@@ -0,0 +1,29 @@
+"""Cached results are shared by every session, so they must not be writable in place."""
+import numpy as np
+import pytest
+
+import fashion_trends as ft
+from fashion_trends.cache import ScoreCache
+
+
+def test_cached_frames_reject_in_place_writes():
+    sel    = ft.make_selection(cities=["Mumbai", "Delhi"], groups=["Sarees"])
+    cache  = ScoreCache()
+    cached = cache.get_or_compute("table", lambda: ft.compute_all_combinations(*sel).copy())
+    before = cached.copy()
+    with pytest.raises(ValueError):
+        cached.loc[cached.index[0], "composite"] = 0
+    with pytest.raises(ValueError):
+        cached.loc[cached.index[0], "city"] = "Delhi"
+    assert cache.get_or_compute("table", None).equals(before)
+
+    # Anything derived from the cached frame is the caller's own
+    top = ft.top_k(cached, 3)
+    top["rank"] = np.arange(1, 4)
+    top.loc[top.index[0], "composite"] = 0
+    assert cache.get_or_compute("table", None).equals(before)
+
+
+def test_arrays_inside_cached_dicts_are_read_only():
+    value = ScoreCache().get_or_compute("agg", lambda: {"counts": np.zeros(3), "parts": (np.ones(2),)})
+    assert not value["counts"].flags.writeable and not value["parts"][0].flags.writeable
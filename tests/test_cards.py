@@ -0,0 +1,28 @@
+"""Card builders are pure string functions over one score-table row."""
+import fashion_trends as ft
+from fashion_trends.cards import (
+    INSIGHT_TEMPLATES, RANK_COLORS, get_insight, hex_to_rgba, sparkline_svg, swatch_html,
+)
+
+
+def test_sparkline_svg_scales_the_series_into_the_viewbox():
+    svg = sparkline_svg([5, 55, 105], RANK_COLORS[0])
+    assert svg.startswith('<svg viewBox="0 0 100 105"') and svg.endswith("</svg>")
+    assert 'points="0.00,100.0 50.00,50.0 100.00,0.0"' in svg
+    assert f'fill="{hex_to_rgba(RANK_COLORS[0], 0.09)}"' in svg
+    # A single point is drawn as a flat line across the width
+    assert 'points="0,105 0.00,55.0 100.00,55.0 100,105"' in sparkline_svg([50], RANK_COLORS[0])
+
+
+def test_swatch_text_stays_readable_on_light_colors():
+    assert "color:#333" in swatch_html("White", "#f5f5f5")
+    assert "color:white" in swatch_html("Navy Blue", "#001f5b")
+    assert hex_to_rgba("#fff", 0.5) == "rgba(255,255,255,0.5)"
+
+
+def test_insights_rotate_with_rank_and_name_the_row():
+    sel = ft.make_selection(cities=["Mumbai"], groups=["Sarees"])
+    row = ft.top_k(ft.compute_all_combinations(*sel), 1).iloc[0]
+    texts = [get_insight(row, rank) for rank in range(len(INSIGHT_TEMPLATES) + 1)]
+    assert len(set(texts[:-1])) == len(INSIGHT_TEMPLATES) and texts[-1] == texts[0]
+    assert all("Mumbai" in t or row["color"] in t for t in texts)
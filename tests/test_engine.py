@@ -0,0 +1,48 @@
+"""The batched engine must reproduce the scalar reference model exactly."""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fashion_trends import (
+    ALL_COLORS, CATEGORIES, PRICE_BUCKETS, SCORE_COLS, TIMEFRAME_OPTIONS, TOP10_CITIES,
+    score_arrays, score_combination, score_frame, top_k_indices,
+)
+
+LABEL_COLS = ["city", "subcat", "group", "price", "color", "color_hex"]
+
+
+def selection():
+    """Every city and price, one sub-category per group, a spread of colors, plus
+    one sub-category, price and color outside the master data (the neutral entry)."""
+    return (
+        tuple(TOP10_CITIES),
+        tuple(next(iter(subs)) for subs in CATEGORIES.values()) + ("Mystery Drape",),
+        tuple(PRICE_BUCKETS) + ("₹9K+",),
+        tuple(ALL_COLORS)[::4] + ("Ultraviolet",),
+    )
+
+
+@pytest.mark.parametrize("timeframe", list(TIMEFRAME_OPTIONS))
+def test_score_frame_matches_scalar(timeframe):
+    sel      = selection()
+    batched  = score_frame(*sel, timeframe)
+    expected = pd.DataFrame([score_combination(*c, timeframe=timeframe) for c in product(*sel)])
+    pd.testing.assert_frame_equal(batched[SCORE_COLS].astype(np.int64), expected[SCORE_COLS])
+    pd.testing.assert_frame_equal(batched[LABEL_COLS].astype(str), expected[LABEL_COLS].astype(str))
+
+
+def test_unknown_city_is_rejected_by_both_paths():
+    cities, subcats, prices, colors = selection()
+    with pytest.raises(KeyError):
+        score_combination("Atlantis", subcats[0], prices[0], colors[0])
+    with pytest.raises(KeyError):
+        score_arrays(("Atlantis",), subcats[:1], prices[:1], colors[:1])
+
+
+def test_top_k_indices_matches_a_stable_sort():
+    values = np.random.default_rng(7).integers(5, 100, size=5000)
+    for k in (0, 1, 10, 5000, 6000):
+        expected = np.argsort(-values, kind="stable")[:k]
+        np.testing.assert_array_equal(top_k_indices(values, k), expected)
@@ -0,0 +1,185 @@
+"""Offline ingestion: the pipeline driven by a recorded Trends session."""
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import requests
+from pytrends.exceptions import ResponseError
+
+from fashion_trends.ingest import (
+    PyTrendsTransport, RecordingTransport, ReplayTransport, TokenBucket, TransientFetchError,
+    TrendsCache, cached_interest, ingest, recent_window,
+)
+
+RECORDING = Path(__file__).parent / "fixtures" / "trends_replay.jsonl"
+KEYWORDS  = ["Kanjeevaram silk saree", "handloom cotton saree", "chiffon georgette saree",
+             "embroidered party saree", "daily wear synthetic saree", "straight A line kurta women",
+             "Anarkali flared kurta"]
+SCOPE     = {"cities": ["Mumbai", "Pune"], "timeframes": ["Last 30 days"], "keywords": KEYWORDS}
+
+
+class FakeClock:
+    """A monotonic clock that only moves when something sleeps on it."""
+
+    def __init__(self):
+        self.now, self.sleeps = 0.0, []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Flaky:
+    """Raise TransientFetchError for the first `failures` calls, then delegate."""
+
+    def __init__(self, inner, failures: int):
+        self.inner, self.failures, self.calls = inner, failures, 0
+
+    def fetch(self, keywords, geo, timeframe):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise TransientFetchError("429 Too Many Requests")
+        return self.inner.fetch(keywords, geo, timeframe)
+
+
+@pytest.fixture
+def cache(tmp_path) -> TrendsCache:
+    return TrendsCache(tmp_path / "trends.sqlite")
+
+
+def run(transport, cache, **kwargs) -> dict:
+    clock = FakeClock()
+    return ingest(transport, cache, bucket=TokenBucket(1.0, clock=clock, sleep=clock.sleep),
+                  sleep=clock.sleep, **{**SCOPE, **kwargs})
+
+
+def test_ingest_fetches_in_five_keyword_batches_once_per_geo(cache):
+    replay = ReplayTransport(RECORDING)
+    stats  = run(replay, cache)
+    # Mumbai and Pune share the IN-MH geo: 7 keywords → one batch of 5 and one of 2
+    assert stats == {"batches": 2, "fetched": 7, "skipped": 0, "failed_batches": 0}
+    assert replay.calls == 2
+    assert cache.fresh_keys("IN-MH", "today 1-m") == set(KEYWORDS)
+
+
+def test_ingest_skips_entries_newer_than_max_age(cache):
+    replay = ReplayTransport(RECORDING)
+    run(replay, cache)
+    stats = run(replay, cache, max_age=3600)
+    assert stats == {"batches": 0, "fetched": 0, "skipped": 7, "failed_batches": 0}
+    assert replay.calls == 2
+
+    for kw in KEYWORDS:                  # age every entry past max_age: all of it is refetched
+        cache.put(kw, "IN-MH", "today 1-m", cache.get(kw, "IN-MH", "today 1-m"), time.time() - 7200)
+    assert run(replay, cache, max_age=3600)["fetched"] == 7
+    assert replay.calls == 4
+
+
+def test_transient_errors_are_retried_with_backoff(cache):
+    flaky, clock = Flaky(ReplayTransport(RECORDING), failures=2), FakeClock()
+    stats = ingest(flaky, cache, bucket=TokenBucket(100.0, capacity=10, clock=clock, sleep=clock.sleep),
+                   sleep=clock.sleep, **SCOPE)
+    assert stats["failed_batches"] == 0 and stats["fetched"] == 7
+    assert flaky.calls == 4
+    assert clock.sleeps == [2.0, 4.0]     # backoff * 2**attempt
+
+
+def test_batches_that_keep_failing_are_counted_not_raised(cache):
+    always = Flaky(ReplayTransport(RECORDING), failures=10**6)
+    stats  = run(always, cache, retries=2)
+    assert stats == {"batches": 2, "fetched": 0, "skipped": 0, "failed_batches": 2}
+    assert always.calls == 6
+    # A batch with no recording is a LookupError, also counted
+    stats = run(ReplayTransport(RECORDING), cache, keywords=["velvet bandhgala"])
+    assert stats["failed_batches"] == 1
+
+
+def test_token_bucket_paces_requests():
+    clock  = FakeClock()
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        bucket.acquire()
+    # Two from the initial burst, then one token every 2 s
+    assert clock.sleeps == [2.0, 2.0]
+    assert clock.now == 4.0
+
+
+def test_recording_round_trips_through_replay(cache, tmp_path):
+    recorded = RecordingTransport(ReplayTransport(RECORDING), tmp_path / "session.jsonl")
+    run(recorded, cache)
+    replay = ReplayTransport(tmp_path / "session.jsonl")
+    assert replay.fetch(KEYWORDS[5:], "IN-MH", "today 1-m") == ReplayTransport(RECORDING).fetch(
+        KEYWORDS[5:], "IN-MH", "today 1-m")
+
+
+def test_cached_interest_reads_the_sqlite_cache(cache):
+    assert cached_interest("Mumbai", "Silk Saree", "Last 30 days", cache) is None
+    run(ReplayTransport(RECORDING), cache)
+    series = cached_interest("Pune", "Silk Saree", "Last 30 days", cache)
+    expected = ReplayTransport(RECORDING).fetch(KEYWORDS[:5], "IN-MH", "today 1-m")["Kanjeevaram silk saree"]
+    assert series == expected
+    assert cached_interest("Mumbai", "Silk Saree", "Last 7 days", cache) is None
+
+
+class FakeTrendReq:
+    """The slice of pytrends.TrendReq the transport uses: answers with a fixed frame, or raises it."""
+
+    def __init__(self, frame):
+        self.frame, self.calls = frame, 0
+
+    def build_payload(self, keywords, timeframe, geo):
+        self.calls += 1
+
+    def interest_over_time(self):
+        if isinstance(self.frame, Exception):
+            raise self.frame
+        return self.frame
+
+
+def pytrends_transport(client) -> PyTrendsTransport:
+    transport = object.__new__(PyTrendsTransport)     # skip TrendReq's network handshake
+    transport._client = client
+    return transport
+
+
+def test_pytrends_transport_keeps_hourly_timestamps():
+    index     = pd.date_range("2026-09-20", periods=48, freq="h")
+    transport = pytrends_transport(FakeTrendReq(pd.DataFrame({"Anarkali flared kurta": range(48)}, index=index)))
+    series = transport.fetch(["Anarkali flared kurta"], "IN-MH", "now 7-d")["Anarkali flared kurta"]
+    assert len(set(series["dates"])) == 48
+    assert series["dates"][1] == "2026-09-20T01:00:00"
+
+
+def http_error(status: int) -> ResponseError:
+    response = requests.Response()
+    response.status_code = status
+    return ResponseError.from_response(response)
+
+
+@pytest.mark.parametrize("error, calls", [
+    (requests.exceptions.ReadTimeout("read timed out"), 3),      # retried, then counted
+    (requests.exceptions.ConnectionError("reset by peer"), 3),
+    (http_error(503), 3),
+    (http_error(400), 1),                                        # a bad payload is not retried
+])
+def test_pytrends_failures_are_counted_not_raised(cache, error, calls):
+    client = FakeTrendReq(error)
+    stats  = run(pytrends_transport(client), cache, keywords=KEYWORDS[5:], retries=2)
+    assert stats == {"batches": 1, "fetched": 0, "skipped": 0, "failed_batches": 1}
+    assert client.calls == calls
+
+
+def test_recent_window_follows_the_sampling_interval(cache):
+    run(ReplayTransport(RECORDING), cache, timeframes=["Last 7 days"], keywords=KEYWORDS[5:])
+    hourly = cached_interest("Mumbai", "Anarkali Kurta", "Last 7 days", cache)
+    daily  = ReplayTransport(RECORDING).fetch(KEYWORDS[5:], "IN-MH", "today 1-m")[KEYWORDS[6]]
+    weekly = [d.isoformat() for d in pd.date_range("2025-10-05", periods=52, freq="W")]
+    assert recent_window(hourly["dates"]) == (24, "24h")
+    assert recent_window(daily["dates"]) == (7, "7d")
+    assert recent_window(weekly) == (4, "4w")
+    # Entries cached before timestamps were kept hold dates only; short series cap the window
+    assert recent_window(["2026-09-14", "2026-09-15", "2026-09-16"]) == (3, "3d")
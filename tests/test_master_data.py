@@ -0,0 +1,136 @@
+"""Master-data hot reload: immutable snapshots swapped under live readers."""
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import fashion_trends as ft
+from fashion_trends import cube, data
+
+
+@pytest.fixture
+def master_file(tmp_path, monkeypatch):
+    """A private copy of the master-data file; the original snapshot is restored afterwards."""
+    path = tmp_path / "master_data.json"
+    path.write_bytes(data.MASTER_DATA_PATH.read_bytes())
+    monkeypatch.setattr(data, "MASTER_DATA_PATH", path)
+    monkeypatch.setattr(cube, "SCORE_STORE_DIR", tmp_path / "store")
+    original = data.latest_master_data()
+    yield path
+    data.install_master_data(original)
+    ft.score_cache().clear()
+
+
+def edit(path, change) -> None:
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    change(doc)
+    doc["revision"] += 1
+    path.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+
+
+def add_indore(doc) -> None:
+    doc["cities"]["Indore"] = {"rank": 11, "market_bn": 8.0, "region": "Central", "tier": "Tier-2"}
+    doc["city_geo"]["Indore"] = "IN-MP"
+
+
+def remove_indore(doc) -> None:
+    del doc["cities"]["Indore"], doc["city_geo"]["Indore"]
+
+
+def test_tables_are_read_only():
+    master = ft.master_data()
+    with pytest.raises(TypeError):
+        master.cities["Atlantis"] = {}
+    with pytest.raises(AttributeError):
+        master.group_sets["street"].add("Sarees")
+    # Nested records too: a write there would desync the tables from the derived registry and store
+    first_color = next(iter(master.colors))
+    nested = [(master.profiles["Mumbai"], "western"), (master.profiles["Mumbai"]["colors"], first_color),
+              (master.cities["Mumbai"], "rank"), (next(iter(master.categories.values())), "Mystery Drape"),
+              (next(iter(master.prices.values())), "color"), (master.colors[first_color], "family")]
+    for record, key in nested:
+        with pytest.raises(TypeError):
+            record[key] = 9.9
+
+
+def test_reload_swaps_the_snapshot_and_pinned_readers_keep_theirs(master_file):
+    western = ft.master_data().profiles["Mumbai"]["western"]
+    with ft.pinned_master_data() as pinned:
+        edit(master_file, lambda doc: doc["city_profiles"]["Mumbai"].update(western=western + 0.5))
+        assert ft.refresh_master_data(force=True) == {"cities": frozenset({"Mumbai"})}
+        assert ft.master_data() is pinned
+        assert ft.CITY_PROFILES["Mumbai"]["western"] == western
+    assert ft.master_data() is ft.latest_master_data() is not pinned
+    assert ft.CITY_PROFILES["Mumbai"]["western"] == western + 0.5
+    assert ft.master_data_info()["revision"] == pinned.info["revision"] + 1
+
+
+def test_patched_store_matches_a_rebuild(master_file):
+    ft.score_cube()                                  # build the store so the reload patches it
+    def change(doc):
+        add_indore(doc)
+        doc["city_profiles"]["Mumbai"]["western"] = 1.9
+        doc["group_sets"]["street"].append("Activewear")
+    edit(master_file, change)
+    changed = ft.refresh_master_data(force=True)
+    assert changed["cities"] == {"Mumbai", "Indore"}
+    dims, store = cube._score_store()
+    assert list(dims[0]) == cube.cube_dims()[0]
+    np.testing.assert_array_equal(store, cube.build_score_store(*cube.cube_dims()))
+
+
+def test_results_from_a_replaced_snapshot_are_not_cached(master_file):
+    sel = ft.make_selection(cities=["Mumbai"], groups=["Sarees"])
+    with ft.pinned_master_data():
+        edit(master_file, lambda doc: doc["city_profiles"]["Mumbai"].update(western=2.0))
+        ft.refresh_master_data(force=True)
+        stale = ft.compute_all_combinations(*sel)
+    fresh = ft.compute_all_combinations(*sel)
+    assert fresh is not stale
+    assert ft.compute_all_combinations(*sel) is fresh
+
+
+def test_reload_under_concurrent_readers(master_file):
+    ft.score_cube()
+    stop, errors = threading.Event(), []
+
+    def read():
+        while not stop.is_set():
+            try:
+                with ft.pinned_master_data():        # as the service pins each request
+                    sel = ft.make_selection(groups=["Sarees"], families=["Neutrals"])
+                    top = ft.top_k(ft.compute_all_combinations(*sel), 5)
+                    ft.city_rankings(top, *sel)
+                    ft.compute_aggregates(*sel)
+                cities = ft.TOP10_CITIES             # unpinned: whichever snapshot is latest
+                for city in cities:
+                    cities[city]["market_bn"]
+            except Exception as exc:                 # any failure fails the test
+                errors.append(exc)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    try:
+        for i in range(6):
+            edit(master_file, add_indore if i % 2 == 0 else remove_indore)
+            assert ft.refresh_master_data(force=True)
+    finally:
+        stop.set()
+        for t in readers:
+            t.join()
+    assert errors == []
+
+
+def test_a_pinned_reader_never_gets_a_newer_snapshots_results(master_file):
+    sel    = ft.make_selection(cities=["Mumbai", "Delhi"], groups=["Sarees"])
+    pinned = ft.master_data()
+    edit(master_file, lambda doc: doc["city_profiles"]["Mumbai"].update(western=2.0, ethnic=0.2))
+    ft.refresh_master_data(force=True)
+    fresh = ft.compute_all_combinations(*sel)          # another session, on the new snapshot
+    with ft.pinned_master_data(pinned):                # a profile-only reload: same selection tuples
+        stale = ft.compute_all_combinations(*sel)
+        np.testing.assert_array_equal(stale["composite"], ft.score_frame(*sel)["composite"])
+    assert not np.array_equal(stale["composite"], fresh["composite"])
@@ -0,0 +1,25 @@
+"""Sharded scoring equals the single-process engine, from any thread and snapshot."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import fashion_trends as ft
+
+
+def test_sharded_table_from_a_worker_thread_matches_the_engine():
+    sel = ft.make_selection(cities=["Mumbai", "Jaipur", "Surat"], groups=["Sarees", "Streetwear"])
+    with ThreadPoolExecutor(max_workers=2) as threads:       # as the service builds its cube
+        table = threads.submit(ft.sharded_table, *sel, workers=2).result()
+    pd.testing.assert_frame_equal(table, ft.add_score_norm(ft.score_frame(*sel)))
+
+
+def test_workers_score_with_the_callers_snapshot():
+    profiles = {c: {**p, "western": 2.5} if c == "Mumbai" else p for c, p in ft.master_data().profiles.items()}
+    sel = ft.make_selection(cities=["Mumbai", "Delhi"], groups=["Dresses", "Sarees"])
+    with ft.pinned_master_data(ft.master_data().replace(profiles=profiles)):
+        expected = ft.score_frame(*sel)
+        scored   = ft.score_sharded(*sel, k=5, workers=2)
+    for i, col in enumerate(ft.SCORE_COLS):
+        np.testing.assert_array_equal(scored["signals"][i], expected[col].to_numpy())
+    assert not np.array_equal(scored["signals"], ft.score_sharded(*sel, k=5, workers=1)["signals"])
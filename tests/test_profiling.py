@@ -0,0 +1,30 @@
+"""Profiling is enabled from the environment only, and a profiler can always be released."""
+import pytest
+
+from fashion_trends.profiling import PROFILE_ENV, RunProfiler, profile_mode
+
+
+@pytest.mark.parametrize("env, requested, mode", [
+    (None,           "cprofile",     None),            # a query param alone can't turn it on
+    ("request",      None,           None),
+    ("request",      "pyinstrument", "pyinstrument"),
+    ("request",      "1",            "cprofile"),
+    ("cprofile",     None,           "cprofile"),
+    ("on",           None,           "cprofile"),
+    ("cprofile",     "pyinstrument", "pyinstrument"),
+    ("cprofile",     "flamegraph",   None),
+])
+def test_profile_mode_requires_the_environment(monkeypatch, env, requested, mode):
+    if env is None:
+        monkeypatch.delenv(PROFILE_ENV, raising=False)
+    else:
+        monkeypatch.setenv(PROFILE_ENV, env)
+    assert profile_mode(requested) == mode
+
+
+def test_stop_reports_once_and_frees_the_hook():
+    profiler = RunProfiler("cprofile").start()
+    sum(range(1000))
+    assert "function calls" in profiler.stop()
+    assert profiler.stop() is None
+    RunProfiler("cprofile").start().stop()           # the hook is free for the next run
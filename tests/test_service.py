@@ -0,0 +1,56 @@
+"""The HTTP service answers every request, including ones whose handler fails."""
+import asyncio
+import json
+
+import fashion_trends as ft
+from fashion_trends.service import TrendService
+
+
+async def exchange(port: int, paths) -> list:
+    """GET each path over one keep-alive connection; [(status, body)]."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    replies = []
+    for path in paths:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        status  = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        replies.append((status, json.loads(await reader.readexactly(int(headers["content-length"])))))
+    writer.close()
+    return replies
+
+
+def run_service(paths, **routes) -> tuple:
+    async def main():
+        service = TrendService(port=0, workers=2)
+        service.routes.update(routes)
+        server  = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        async with server:
+            replies = await exchange(server.sockets[0].getsockname()[1], paths)
+        return replies, service.stats()
+    return asyncio.run(main())
+
+
+def broken(query):
+    raise KeyError("Indore")
+
+
+def test_unexpected_errors_are_answered_with_500_and_counted():
+    replies, stats = run_service(["/broken", "/top?n=1&cities=Atlantis", "/top?n=1&cities=Mumbai"],
+                                 **{"/broken": broken})
+    assert replies[0] == (500, {"error": "KeyError: 'Indore'"})
+    assert replies[1] == (400, {"error": "unknown cities: Atlantis"})
+    # The connection survived both errors
+    assert replies[2][0] == 200 and replies[2][1]["rows"][0]["city"] == "Mumbai"
+    assert stats["requests"] == 3 and stats["errors"] == 2
+
+
+def test_top_defaults_to_the_clis_min_velocity():
+    replies, _ = run_service(["/top?n=5&cities=Jaipur", "/top?n=5&cities=Jaipur&min_velocity=0"])
+    assert replies[0] == replies[1]
+    assert replies[0][1]["min_velocity"] == 0
+    expected = ft.top_k(ft.compute_all_combinations(*ft.make_selection(cities=["Jaipur"])), 5, 0)
+    assert [r["subcat"] for r in replies[0][1]["rows"]] == list(expected["subcat"])
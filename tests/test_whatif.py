@@ -0,0 +1,30 @@
+"""What-if sessions rescore a slice and must agree with a full rescore of the changed snapshot."""
+import pandas as pd
+
+import fashion_trends as ft
+from fashion_trends.whatif import WhatIfSession
+
+SELECTION = ft.make_selection(cities=["Mumbai", "Jaipur", "Delhi"], groups=["Sarees", "Streetwear"])
+
+
+def test_a_call_with_nothing_to_change_rescores_nothing():
+    session = WhatIfSession(*SELECTION, k=10, min_velocity=0)
+    before  = session.top()
+    assert session.apply("Jaipur")["rows"] == 0
+    assert session.apply("Jaipur", colors={})["rows"] == 0
+    pd.testing.assert_frame_equal(session.top(), before)
+
+
+def test_applied_profiles_match_a_full_rescore():
+    session = WhatIfSession(*SELECTION, k=10, min_velocity=0)
+    session.apply("Mumbai", streetwear=2.2)
+    session.apply("Jaipur", colors={"Pink": 2.5, "Red": 0.3})
+    master   = ft.master_data()
+    profiles = {**master.profiles,
+                "Mumbai": {**master.profiles["Mumbai"], "streetwear": 2.2},
+                "Jaipur": {**master.profiles["Jaipur"],
+                           "colors": {**master.profiles["Jaipur"]["colors"], "Pink": 2.5, "Red": 0.3}}}
+    with ft.pinned_master_data(master.replace(profiles=profiles)):
+        full = ft.add_score_norm(ft.score_frame(*SELECTION))
+    pd.testing.assert_frame_equal(session.table(), full)
+    pd.testing.assert_frame_equal(session.top(), ft.top_k(full, 10, 0))